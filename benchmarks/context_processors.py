@@ -0,0 +1,74 @@
+"""Стоимость каждого контекстного процессора на запрос.
+
+    python benchmarks/context_processors.py
+
+Процессоры из ``TEMPLATES`` вызываются на каждой отрисовке с
+``RequestContext`` — на всех страницах, включая админку и ошибки.
+Для каждого печатается медиана вызова процессора и вызова вместе с
+чтением всех его значений так, как их читает шаблон (вызываемые
+значения вызываются, ленивые — вычисляются). Разница показывает, что
+процессор откладывает до чтения. Запросы настоящие, прошедшие через
+middleware, — от анонима и от вошедшего пользователя.
+"""
+import argparse
+import statistics
+import time
+
+from utils import setup
+
+RUNS = 10000
+
+
+def timed(function):
+    function()
+    durations = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1_000_000
+
+
+def read(value):
+    """Значение так, как его получит шаблон при выводе."""
+    if callable(value) and not getattr(
+        value, 'do_not_call_in_templates', False
+    ):
+        value = value()
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='/tmp/yatube-context.sqlite3')
+    args = parser.parse_args()
+
+    setup(args.db)
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.utils.module_loading import import_string
+
+    user, _ = get_user_model().objects.get_or_create(username='benchmark')
+    anonymous = Client()
+    logged_in = Client()
+    logged_in.force_login(user)
+    requests = {
+        'anonymous': anonymous.get('/about/author/').wsgi_request,
+        'logged in': logged_in.get('/about/author/').wsgi_request,
+    }
+    paths = settings.TEMPLATES[0]['OPTIONS']['context_processors']
+    print(f'{"processor":<52}{"request":<11}{"call, us":>10}{"read, us":>10}')
+    for path in paths:
+        processor = import_string(path)
+        for name, request in requests.items():
+            call = timed(lambda: processor(request))
+            with_read = timed(lambda: [
+                read(value) for value in processor(request).values()
+            ])
+            print(f'{path:<52}{name:<11}{call:>10.2f}{with_read:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Списки подписчиков, взаимные подписки и рекомендации у популярного автора.
+
+    python benchmarks/follows.py --followers 100000 --db /tmp/yatube-follows.db
+
+У авторов ``star`` и ``sparse`` по ``--followers`` подписчиков. ``star``
+подписан в ответ на каждого десятого, ``sparse`` — только на троих
+самых первых, так что их взаимные подписки найдутся лишь в конце обхода
+подписчиков. Каждый подписчик подписан ещё на несколько авторов из
+небольшого круга. Печатается медианное время ответа view для первой и
+последней страницы подписчиков (курсор ``?after=`` и прежний
+``?page=N`` с OFFSET), подписок, взаимных подписок и рекомендаций, а
+также цена COUNT(*), который заменяют счётчики ``UserStats``.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from utils import setup
+
+RUNS = 10
+BATCH = 10000
+CIRCLE = 50
+SPARSE_MUTUAL = 3
+
+
+def timed(view, request, *args):
+    durations = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        view(request, *args)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+def seed(followers):
+    """Автор ``star``, его подписчики и круг авторов для рекомендаций."""
+    from django.db import transaction
+
+    from posts import counters
+    from posts.models import Follow, User
+
+    if User.objects.filter(username='star').exists():
+        return
+    started = time.perf_counter()
+    with transaction.atomic():
+        # bulk_create не шлёт сигналы: счётчики пересчитываются в конце.
+        User.objects.bulk_create(
+            [User(username='star'), User(username='sparse')]
+            + [User(username=f'circle{n}') for n in range(CIRCLE)]
+            + [User(username=f'fan{n}') for n in range(followers)],
+        )
+        star = User.objects.get(username='star')
+        sparse = User.objects.get(username='sparse')
+        circle = list(User.objects.filter(
+            username__startswith='circle'
+        ).values_list('pk', flat=True))
+        fans = User.objects.filter(
+            username__startswith='fan'
+        ).order_by('pk').values_list('pk', flat=True)
+        edges = []
+        for number, fan in enumerate(fans.iterator()):
+            edges.append(Follow(user_id=fan, author=star))
+            edges.append(Follow(user_id=fan, author=sparse))
+            edges.extend(
+                Follow(user_id=fan, author_id=circle[(number + k) % CIRCLE])
+                for k in range(3)
+            )
+            if number % 10 == 0:
+                edges.append(Follow(user=star, author_id=fan))
+            if number < SPARSE_MUTUAL:
+                edges.append(Follow(user=sparse, author_id=fan))
+            if len(edges) >= BATCH:
+                Follow.objects.bulk_create(edges)
+                edges = []
+        Follow.objects.bulk_create(edges)
+        counters.reconcile()
+    print(
+        f'seeded {followers} followers in '
+        f'{time.perf_counter() - started:.1f}s',
+        file=sys.stderr,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='/tmp/yatube-follows.sqlite3')
+    parser.add_argument('--followers', type=int, default=100_000)
+    args = parser.parse_args()
+
+    setup(args.db)
+    seed(args.followers)
+
+    from django.test import RequestFactory
+
+    from posts import follows, views
+    from posts.models import Follow, User
+    from posts.paginator import make_pk_cursor
+
+    factory = RequestFactory()
+    star = User.objects.get(username='star')
+    fan = User.objects.get(username='fan0')
+    oldest = Follow.objects.filter(author=star).order_by('pk').values_list(
+        'pk', flat=True
+    )[views.PEOPLE]
+    last_page = args.followers // views.PEOPLE
+
+    def request(**params):
+        request = factory.get('/', params)
+        request.user = fan
+        return request
+
+    cases = {
+        'followers, first page': (views.followers, request(), 'star'),
+        'followers, last page': (
+            views.followers, request(after=make_pk_cursor(oldest)), 'star'
+        ),
+        'followers, ?page=N': (
+            views.followers, request(page=last_page), 'star'
+        ),
+        'following, first page': (views.following, request(), 'star'),
+        'mutual, first page': (views.mutual, request(), 'star'),
+        'mutual, sparse': (views.mutual, request(), 'sparse'),
+    }
+    for name, (view, page_request, username) in cases.items():
+        duration = timed(view, page_request, username)
+        print(f'{name:<24} {duration:8.1f} ms')
+    print(f'{"suggestions":<24} {timed(views.suggestions, request()):8.1f} ms')
+    count = timed(lambda request: follows.followers(star).count(), None)
+    print(f'{"COUNT(*) of followers":<24} {count:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
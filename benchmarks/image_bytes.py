@@ -0,0 +1,91 @@
+"""Байты картинок на странице ленты до и после srcset.
+
+    python benchmarks/image_bytes.py --page 10
+
+До: каждый клиент получает одну JPEG-миниатюру 960x339. После: браузер
+выбирает из ``<picture>`` первый поддерживаемый формат и самую узкую
+ширину, покрывающую слот картинки с учётом плотности пикселей экрана.
+Исходники — синтетические «фотографии» с градиентом и шумом.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from utils import setup
+
+PAGE = 10
+SOURCE_SIZE = (2400, 1600)
+CLIENTS = (
+    # Название, ширина окна в CSS-пикселях, плотность, форматы.
+    ('phone, old browser', 360, 2, ('JPEG',)),
+    ('phone, low dpi', 360, 1, ('WEBP', 'JPEG')),
+    ('phone', 390, 3, ('AVIF', 'WEBP', 'JPEG')),
+    ('tablet', 768, 2, ('WEBP', 'JPEG')),
+    ('laptop', 1280, 1, ('WEBP', 'JPEG')),
+    ('desktop, hidpi', 1920, 2, ('AVIF', 'WEBP', 'JPEG')),
+)
+
+
+def pick(urls, sizes, width, dpr, formats):
+    """Вариант, который выберет браузер: формат, затем ширина."""
+    from posts.thumbnails import SIZE
+
+    needed = min(width, SIZE[0]) * dpr
+    for format in formats:
+        widths = sorted(w for f, w in urls if f == format)
+        if widths:
+            chosen = next((w for w in widths if w >= needed), widths[-1])
+            return sizes[urls[format, chosen]]
+    raise ValueError('нет ни одного варианта')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page', type=int, default=PAGE)
+    args = parser.parse_args()
+
+    media = tempfile.mkdtemp(prefix='yatube-media-')
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'yatube.settings'
+    from django.conf import settings
+    settings.MEDIA_ROOT = media
+    setup(os.path.join(media, 'db.sqlite3'))
+
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from sorl.thumbnail import get_thumbnail
+
+    from posts import thumbnails
+    from posts.dataset import source_image
+
+    before = 0
+    after = {name: 0 for name, *_ in CLIENTS}
+    for number in range(args.page):
+        name = default_storage.save(
+            f'posts/bench{number}.jpg',
+            ContentFile(source_image(number, SOURCE_SIZE)),
+        )
+        old = get_thumbnail(name, '960x339', crop='center', upscale=True)
+        before += old.storage.size(old.name)
+        thumbnails.generate(name)
+        urls, sizes = {}, {}
+        for variant in thumbnails.VARIANTS:
+            thumbnail = thumbnails.thumbnail_file(name, *variant)
+            urls[variant] = thumbnail.url
+            sizes[thumbnail.url] = default_storage.size(thumbnail.name)
+        for client, width, dpr, formats in CLIENTS:
+            after[client] += pick(urls, sizes, width, dpr, formats)
+
+    print(f'variants: {thumbnails.VARIANTS}')
+    print(f'{"client":<22}{"before, KB":>12}{"after, KB":>12}{"saved":>8}')
+    for client, *_ in CLIENTS:
+        print(
+            f'{client:<22}{before / 1024:>12.1f}'
+            f'{after[client] / 1024:>12.1f}'
+            f'{1 - after[client] / before:>8.0%}'
+        )
+    shutil.rmtree(media)
+
+
+if __name__ == '__main__':
+    main()
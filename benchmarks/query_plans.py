@@ -0,0 +1,71 @@
+"""Планы и время запросов лент на большом наборе данных.
+
+    python benchmarks/query_plans.py --posts 1000000 --db /tmp/yatube.db
+
+Для каждого запроса, который выполняют ленты, печатает
+``EXPLAIN QUERY PLAN`` и медианное время выполнения.
+"""
+import argparse
+import statistics
+import time
+
+from utils import seed, setup
+
+PAGE = 11
+RUNS = 20
+
+
+def timed(queryset):
+    durations = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        list(queryset.all())
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+def feed_queries():
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Comment, FeedEntry, Follow, Group, Post
+    from posts.paginator import ORDERING, older
+
+    user_model = get_user_model()
+    user = user_model.objects.order_by('pk').first()
+    author = user_model.objects.order_by('-pk').first()
+    group = Group.objects.order_by('pk').first()
+    post = Post.objects.order_by('pk').first()
+    middle = Post.objects.order_by(*ORDERING)[Post.objects.count() // 2]
+    posts = Post.objects.feed().order_by(*ORDERING)
+    deep = older(middle.created, middle.pk)
+    return {
+        'index': posts[:PAGE],
+        'index, deep cursor': posts.filter(deep)[:PAGE],
+        'group_list': posts.filter(group=group)[:PAGE],
+        'profile': posts.filter(author=author)[:PAGE],
+        'follow_index': FeedEntry.objects.filter(
+            user=user
+        ).feed().order_by(*ORDERING)[:PAGE],
+        'post_detail comments': Comment.objects.filter(
+            post=post
+        ).order_by('created'),
+        'follow edge': Follow.objects.filter(user=user, author=author),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='/tmp/yatube-bench.sqlite3')
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup(args.db)
+    seed(args.posts, search_index=False)
+    for name, queryset in feed_queries().items():
+        print(f'== {name}: {timed(queryset):.2f} ms')
+        print(queryset.explain())
+        print()
+
+
+if __name__ == '__main__':
+    main()
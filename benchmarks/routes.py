@@ -0,0 +1,289 @@
+"""Задержка, число запросов и размер ответа каждого маршрута posts.urls.
+
+    python benchmarks/routes.py --sizes 1000 10000 100000 --output new.json
+    python benchmarks/routes.py --compare base.json new.json --threshold 0.2
+
+Для каждого размера набора данных (число постов) бенчмарк наполняет
+отдельную базу ``posts.dataset`` и в отдельном процессе прогоняет через
+тестовый клиент все маршруты ``posts.urls``: страницы — без кеша и с
+прогретым кешем, формы и действия — POST-запросами в транзакции, которая
+потом откатывается. Для каждого маршрута записываются p50/p95 задержки,
+число SQL-запросов и байты ответа.
+
+В режиме ``--compare`` печатает разницу двух файлов результатов и
+завершается с кодом 1, если p50 или байты выросли больше чем на
+``--threshold`` или стало больше запросов.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from utils import ROOT, seed, setup
+
+SIZES = (1000, 10000, 100000)
+RUNS = 30
+THRESHOLD = 0.2
+
+
+def dataset_options(size):
+    return {
+        'users': max(50, size // 100),
+        'groups': 20,
+        'comments': size // 5,
+        'follows': 20,
+    }
+
+
+def percentile(durations, share):
+    ordered = sorted(durations)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def measure(request, runs, prepare=None):
+    """Прогоняет ``request()`` ``runs`` раз; один лишний — для запросов."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    if prepare:
+        prepare()
+    request()
+    durations = []
+    for _ in range(runs):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        response = request()
+        durations.append((time.perf_counter() - started) * 1000)
+    if prepare:
+        prepare()
+    with CaptureQueriesContext(connection) as queries:
+        response = request()
+    if response.status_code >= 400:
+        raise RuntimeError(f'{response.status_code} от {response}')
+    content = (
+        b''.join(response.streaming_content) if response.streaming
+        else response.content
+    )
+    return {
+        'p50_ms': round(statistics.median(durations), 3),
+        'p95_ms': round(percentile(durations, 0.95), 3),
+        'queries': len(queries),
+        'bytes': len(content),
+        'status': response.status_code,
+    }
+
+
+def routes(client, viewer):
+    """Маршрут → (функция запроса, подготовка перед каждым запуском)."""
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.urls import reverse
+
+    from posts.dataset import word
+    from posts.models import Follow, Group, Post
+
+    user_model = get_user_model()
+    group = Group.objects.order_by('pk').first()
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    own = Post.objects.filter(author=viewer).order_by('pk').first()
+    author = user_model.objects.exclude(pk=viewer.pk).exclude(
+        pk__in=Follow.objects.filter(user=viewer).values('author_id')
+    ).order_by('-stats__followers_count', 'pk').first()
+    popular = user_model.objects.order_by(
+        '-stats__posts_count', 'pk'
+    ).first()
+    followed = user_model.objects.order_by(
+        '-stats__followers_count', 'pk'
+    ).first()
+
+    def get(name, *args, **params):
+        url = reverse(f'posts:{name}', args=args)
+        return lambda: client.get(url, params)
+
+    def post_form(name, data, *args):
+        url = reverse(f'posts:{name}', args=args)
+        return lambda: client.post(url, data)
+
+    def unfollow_prepare():
+        Follow.objects.get_or_create(user=viewer, author=author)
+
+    def follow_prepare():
+        Follow.objects.filter(user=viewer, author=author).delete()
+
+    pages = {
+        'index': get('index'),
+        'index, deep page': get('index', page=50),
+        'group_list': get('group_list', group.slug),
+        'profile': get('profile', popular.username),
+        'post_detail': get('post_detail', post.pk),
+        'post_comments': get('post_comments', post.pk),
+        'search': get('search', q=word(5)),
+        'follow_index': get('follow_index'),
+        'followers': get('followers', followed.username),
+        'following': get('following', viewer.username),
+        'mutual': get('mutual', followed.username),
+        'suggestions': get('suggestions'),
+        'post_create, form': get('post_create'),
+        'post_edit, form': get('post_edit', own.pk),
+    }
+    actions = {
+        'post_create': (
+            post_form('post_create', {'text': 'Новый пост'}), None
+        ),
+        'post_edit': (
+            post_form('post_edit', {'text': 'Правка'}, own.pk), None
+        ),
+        'add_comment': (
+            post_form('add_comment', {'text': 'Комментарий'}, post.pk),
+            None,
+        ),
+        'profile_follow': (
+            get('profile_follow', author.username), follow_prepare
+        ),
+        'profile_unfollow': (
+            get('profile_unfollow', author.username), unfollow_prepare
+        ),
+    }
+    results = {}
+    for name, request in pages.items():
+        results[f'{name}, cold'] = (request, cache.clear)
+        results[f'{name}, warm'] = (request, None)
+    results.update(actions)
+    return results
+
+
+def run(size, runs, db):
+    """Меряет маршруты на одном наборе данных; печатает JSON в stdout."""
+    setup(db)
+    seed(size, **dataset_options(size))
+
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from django.test import Client
+
+    viewer = get_user_model().objects.filter(
+        posts__isnull=False, follower__isnull=False
+    ).order_by('pk').first()
+    client = Client()
+    client.force_login(viewer)
+    results = {}
+    for name, (request, prepare) in routes(client, viewer).items():
+        with transaction.atomic():
+            results[name] = measure(request, runs, prepare)
+            transaction.set_rollback(True)
+    json.dump(results, sys.stdout)
+
+
+def collect(sizes, runs, db_template):
+    results = {}
+    for size in sizes:
+        db = db_template.format(size=size)
+        output = subprocess.run(
+            [
+                sys.executable, __file__, '--run', str(size),
+                '--runs', str(runs), '--db', db,
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        results[str(size)] = json.loads(output)
+        print(f'size {size}: done', file=sys.stderr)
+    commit = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    ).stdout.strip()
+    return {
+        'meta': {
+            'commit': commit,
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'runs': runs,
+        },
+        'results': results,
+    }
+
+
+def report(data):
+    for size, routes_ in data['results'].items():
+        print(f'== {size} posts')
+        print(f'{"route":<28}{"p50, ms":>9}{"p95, ms":>9}'
+              f'{"queries":>9}{"bytes":>9}')
+        for name, row in routes_.items():
+            print(
+                f'{name:<28}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["queries"]:>9}{row["bytes"]:>9}'
+            )
+
+
+def compare(base, new, threshold):
+    """Печатает изменения; возвращает число регрессий."""
+    regressions = 0
+    for size, routes_ in new['results'].items():
+        print(f'== {size} posts ({base["meta"]["commit"]} -> '
+              f'{new["meta"]["commit"]})')
+        for name, row in routes_.items():
+            old = base['results'].get(size, {}).get(name)
+            if old is None:
+                print(f'{name:<28} new')
+                continue
+            problems = []
+            if row['p50_ms'] > old['p50_ms'] * (1 + threshold):
+                problems.append('p50')
+            if row['bytes'] > old['bytes'] * (1 + threshold):
+                problems.append('bytes')
+            if row['queries'] > old['queries']:
+                problems.append('queries')
+            regressions += bool(problems)
+            print(
+                f'{name:<28}'
+                f'{old["p50_ms"]:>8.2f} -> {row["p50_ms"]:<8.2f}'
+                f'{old["queries"]:>4} -> {row["queries"]:<4}'
+                f'{old["bytes"]:>8} -> {row["bytes"]:<8}'
+                f'{"REGRESSION: " + ", ".join(problems) if problems else ""}'
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument(
+        '--db', default='/tmp/yatube-routes-{size}.sqlite3',
+        help='Путь к базе; {size} заменяется размером набора.',
+    )
+    parser.add_argument('--output', help='Куда записать результаты JSON.')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--run', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.runs, args.db)
+        return
+    if args.compare:
+        with open(args.compare[0]) as base, open(args.compare[1]) as new:
+            regressions = compare(
+                json.load(base), json.load(new), args.threshold
+            )
+        print(f'regressions: {regressions}')
+        sys.exit(1 if regressions else 0)
+    data = collect(args.sizes, args.runs, args.db)
+    report(data)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(data, output, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    main()
@@ -0,0 +1,79 @@
+"""Задержка поиска по постам на большом наборе данных.
+
+    python benchmarks/search.py --posts 1000000 --db /tmp/yatube-search.db
+
+Тексты постов из ``posts.dataset`` собираются из словаря с распределением
+Ципфа, поэтому в запросах есть и частые слова с сотнями тысяч вхождений,
+и редкие. Для каждого запроса печатается число найденных постов и
+медианное время ответа ``/search/`` для первой и следующей страницы;
+частоты слов к этому моменту уже лежат в кеше.
+"""
+import argparse
+import statistics
+import time
+
+from utils import seed, setup
+
+RUNS = 10
+# Ранги слов в словаре posts.dataset: чем меньше ранг, тем чаще слово.
+QUERIES = {
+    'частое слово': [5],
+    'среднее слово': [300],
+    'редкое слово': [20000],
+    'два частых слова': [5, 20],
+    'частое и среднее': [5, 300],
+}
+
+
+def timed(view, request):
+    durations = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        view(request)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='/tmp/yatube-search.sqlite3')
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup(args.db)
+    seed(args.posts)
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    from posts import search
+    from posts.dataset import word
+    from posts.paginator import paginate
+    from posts.views import POSTS
+    from posts.views import search as search_view
+
+    factory = RequestFactory()
+
+    def request(path, *args):
+        request = factory.get(path, *args)
+        request.user = AnonymousUser()
+        return request
+
+    for name, ranks in QUERIES.items():
+        query = ' '.join(word(rank) for rank in ranks)
+        total = search.ranked(query).count()
+        first_request = request('/', {'q': query})
+        first = timed(search_view, first_request)
+        page_obj = paginate(
+            search.ranked(query), first_request, POSTS,
+            search.SearchPaginator,
+        )
+        second = timed(search_view, request('/?' + page_obj.next_query))
+        print(
+            f'{name:<18} matches {total:>7}  '
+            f'first page {first:7.1f} ms  next page {second:7.1f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Время отрисовки страницы ленты: загрузчики шаблонов и цикл постов.
+
+    python benchmarks/templates.py --posts 10000 --db /tmp/yatube-templates.db
+
+Страница ``posts/index.html`` из десяти постов рисуется с уже готовым
+``page_obj`` — база в замер не входит. Сравниваются загрузчики без кеша
+(как при DEBUG) и ``cached.Loader``, а также прежний цикл с
+``{% include 'posts/includes/post.html' %}`` на каждый пост и тег
+``{% post_list %}``, который берёт готовые фрагменты постов из кеша
+(``posts.fragments``): без фрагментов (кеш очищается перед каждой
+отрисовкой, и к отрисовке добавляются чтение и запись кеша) и с ними.
+"""
+import argparse
+import statistics
+import time
+
+from utils import seed, setup
+
+RUNS = 300
+# posts/index.html до тега post_list: include на каждый пост.
+INCLUDE_LOOP = """{% extends 'base.html' %}
+{% block title %}
+  Последние обновления на сайте
+{% endblock %}
+{% block content %}
+  <h1>
+    Последние обновления на сайте
+  </h1>
+  {% include 'posts/includes/switcher.html' %}
+  {% for post in page_obj %}
+    {% include 'posts/includes/post.html' with group_links=True %}
+    {% if not forloop.last %}
+      <hr>
+    {% endif %}
+  {% endfor %}
+  {% include 'posts/includes/paginator.html' %}
+{% endblock %}
+"""
+LOADERS = [
+    ('django.template.loaders.locmem.Loader', {
+        'benchmarks/include_loop.html': INCLUDE_LOOP,
+    }),
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+PAGES = {
+    'include in loop': ('benchmarks/include_loop.html', True),
+    'post_list': ('posts/index.html', True),
+    'post_list, cached': ('posts/index.html', False),
+}
+
+
+def timed(render, prepare=None):
+    render()
+    durations = []
+    for _ in range(RUNS):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        render()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='/tmp/yatube-templates.sqlite3')
+    parser.add_argument('--posts', type=int, default=10000)
+    args = parser.parse_args()
+
+    setup(args.db)
+    seed(args.posts)
+
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.template import RequestContext
+    from django.template.backends.django import DjangoTemplates
+    from django.test import RequestFactory
+
+    from posts.models import Post
+    from posts.paginator import paginate
+    from posts.thumbnails import prefetch_urls
+    from posts.views import POSTS
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    page_obj = paginate(Post.objects.feed(), request, POSTS)
+    prefetch_urls(page_obj)
+    list(page_obj)
+
+    engines = {
+        'no cache': LOADERS,
+        'cached': [('django.template.loaders.cached.Loader', LOADERS)],
+    }
+    for name, loaders in engines.items():
+        options = dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders)
+        engine = DjangoTemplates({
+            'NAME': name,
+            'DIRS': [settings.TEMPLATES_DIR],
+            'APP_DIRS': False,
+            'OPTIONS': options,
+        }).engine
+        for page, (template_name, cold) in PAGES.items():
+            def render():
+                return engine.get_template(template_name).render(
+                    RequestContext(request, {'page_obj': page_obj})
+                )
+            duration = timed(render, cache.clear if cold else None)
+            print(f'{name:<10} {page:<18} {duration:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
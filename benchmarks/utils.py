@@ -0,0 +1,45 @@
+"""Общая подготовка Django и тестовых данных для бенчмарков.
+
+Бенчмарки работают с отдельной базой SQLite, путь к которой передаётся
+в ``setup()``, и никогда не трогают ``db.sqlite3`` проекта.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'yatube'))
+
+
+def setup(db_path):
+    """Настраивает Django на базу ``db_path`` и применяет миграции."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    os.environ.setdefault('DEBUG', '0')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(posts, **options):
+    """Заполняет базу набором ``posts.dataset.generate(posts, **options)``.
+
+    Если постов в базе уже не меньше ``posts``, ничего не делает, поэтому
+    один и тот же файл базы можно переиспользовать между запусками.
+    """
+    from posts import dataset
+    from posts.models import Post
+
+    if Post.objects.count() >= posts:
+        return
+    started = time.perf_counter()
+    dataset.generate(posts, **options)
+    print(
+        f'seeded {posts} posts in {time.perf_counter() - started:.1f}s',
+        file=sys.stderr,
+    )
@@ -0,0 +1,159 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ApiAuthor')
+        cls.reader = User.objects.create_user(username='ApiReader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(15)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, json.loads(b''.join(response.streaming_content))
+
+    def walk(self, url, **params):
+        """Все страницы по ссылкам ``next``."""
+        response, page = self.get(url, **params)
+        results = page['results']
+        while page['next']:
+            response, page = self.get(page['next'])
+            results += page['results']
+        return results
+
+    def test_feeds(self):
+        """Ленты отдают все посты от новых к старым без повторов"""
+        self.client.force_login(self.reader)
+        expected = [post.pk for post in reversed(self.posts)]
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', args=[self.group.slug]),
+            reverse('api:profile', args=[self.author.username]),
+            reverse('api:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                results = self.walk(url, limit=4)
+                self.assertEqual([row['id'] for row in results], expected)
+
+    def test_post_fields(self):
+        """Пост сериализуется с автором и группой"""
+        response, page = self.get(reverse('api:index'), limit=1)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        post = self.posts[-1]
+        self.assertEqual(page['results'], [{
+            'id': post.pk,
+            'text': post.text,
+            'created': DjangoJSONEncoder().default(post.created),
+            'author': 'ApiAuthor',
+            'group': 'api-group',
+            'image': None,
+            'comments_count': 0,
+        }])
+        self.assertIn('after=', page['next'])
+
+    def test_post_detail_and_comments(self):
+        """Пост отдаётся со ссылкой на комментарии от старых к новым"""
+        post = self.posts[0]
+        comments = [
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {number}'
+            )
+            for number in range(5)
+        ]
+        response = self.client.get(reverse('api:post_detail', args=[post.pk]))
+        data = response.json()
+        self.assertEqual(data['comments_count'], 5)
+        results = self.walk(data['comments'], limit=2)
+        self.assertEqual(
+            [row['id'] for row in results],
+            [comment.pk for comment in comments],
+        )
+
+    def test_follow_lists(self):
+        """Подписчики, подписки и рекомендации со счётчиками из UserStats"""
+        fans = [
+            User.objects.create_user(username=f'ApiFan{number}')
+            for number in range(5)
+        ]
+        for fan in fans:
+            Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.author, author=fans[0])
+        Follow.objects.create(user=fans[0], author=self.reader)
+        expected = [fan.username for fan in reversed(fans)] + ['ApiReader']
+        results = self.walk(
+            reverse('api:followers', args=[self.author.username]), limit=2
+        )
+        self.assertEqual([row['username'] for row in results], expected)
+        self.assertEqual(results[-1]['following_count'], 1)
+        results = self.walk(
+            reverse('api:mutual', args=[self.author.username]), limit=2
+        )
+        self.assertEqual([row['username'] for row in results], ['ApiFan0'])
+        UserStats.objects.filter(user=self.author).delete()
+        results = self.walk(
+            reverse('api:mutual', args=[self.author.username]), limit=2
+        )
+        self.assertEqual([row['username'] for row in results], ['ApiFan0'])
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('api:suggestions'))
+        self.assertEqual(response.json()['results'], [{
+            'username': 'ApiReader',
+            'first_name': '',
+            'last_name': '',
+            'followers_count': 1,
+            'following_count': 1,
+            'paths': 1,
+        }])
+
+    def test_errors(self):
+        """Несуществующие объекты и лента без входа возвращают ошибку"""
+        urls = {
+            reverse('api:group_posts', args=['missing']): 404,
+            reverse('api:profile', args=['missing']): 404,
+            reverse('api:post_detail', args=[0]): 404,
+            reverse('api:post_comments', args=[0]): 404,
+            reverse('api:follow_index'): 401,
+            reverse('api:followers', args=['missing']): 404,
+            reverse('api:suggestions'): 401,
+        }
+        for url, status in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+
+    def test_read_only(self):
+        """API только читает: прочие методы получают 405"""
+        urls = [
+            reverse('api:index'),
+            reverse('api:profile', args=[self.author.username]),
+            reverse('api:post_comments', args=[self.posts[0].pk]),
+            reverse('api:followers', args=[self.author.username]),
+        ]
+        for url in urls:
+            for method in ('post', 'put', 'delete'):
+                with self.subTest(url=url, method=method):
+                    response = getattr(self.client, method)(url)
+                    self.assertEqual(response.status_code, 405)
+            with self.subTest(url=url, method='head'):
+                self.assertEqual(self.client.head(url).status_code, 200)
@@ -0,0 +1,44 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/posts/', views.index, name='index'),
+    path(
+        'v1/groups/<slug:slug>/posts/',
+        views.group_posts,
+        name='group_posts'
+    ),
+    path(
+        'v1/profiles/<str:username>/posts/',
+        views.profile,
+        name='profile'
+    ),
+    path('v1/follow/', views.follow_index, name='follow_index'),
+    path(
+        'v1/follow/suggestions/', views.suggestions, name='suggestions'
+    ),
+    path(
+        'v1/profiles/<str:username>/followers/',
+        views.followers,
+        name='followers'
+    ),
+    path(
+        'v1/profiles/<str:username>/following/',
+        views.following,
+        name='following'
+    ),
+    path(
+        'v1/profiles/<str:username>/mutual/',
+        views.mutual,
+        name='mutual'
+    ),
+    path('v1/posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'v1/posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+]
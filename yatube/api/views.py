@@ -0,0 +1,266 @@
+"""Read-only JSON API для лент и подписок, версия 1.
+
+Выбираются только поля, которые попадают в ответ (``values()``), строки
+читаются из базы итератором и кодируются по одной, поэтому ответ не
+собирается в памяти целиком. Страницы листаются курсором ``?after=``
+из поля ``next``; размер страницы задаётся ``?limit=``.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+
+from posts import follows
+from posts.models import Comment, FeedEntry, Group, Post
+from posts.paginator import CommentPaginator, CursorPaginator, FollowPaginator
+
+LIMIT = 10
+MAX_LIMIT = 100
+POST_FIELDS = (
+    'id',
+    'text',
+    'created',
+    'image',
+    'comments_count',
+    'author__username',
+    'group__slug',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+PERSON_FIELDS = (
+    'username',
+    'first_name',
+    'last_name',
+    'stats__followers_count',
+    'stats__following_count',
+)
+User = get_user_model()
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def not_found():
+    return error(404, 'Не найдено.')
+
+
+def limit(request):
+    try:
+        value = int(request.GET.get('limit', LIMIT))
+    except ValueError:
+        value = LIMIT
+    return min(max(value, 1), MAX_LIMIT)
+
+
+def serialize_post(row, prefix=''):
+    image = row[f'{prefix}image']
+    return {
+        'id': row[f'{prefix}id'],
+        'text': row[f'{prefix}text'],
+        'created': row[f'{prefix}created'],
+        'author': row[f'{prefix}author__username'],
+        'group': row[f'{prefix}group__slug'],
+        'image': default_storage.url(image) if image else None,
+        'comments_count': row[f'{prefix}comments_count'],
+    }
+
+
+def serialize_entry(row):
+    return serialize_post(row, prefix='post__')
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def serialize_person(row, prefix=''):
+    return {
+        'username': row[f'{prefix}username'],
+        'first_name': row[f'{prefix}first_name'],
+        'last_name': row[f'{prefix}last_name'],
+        'followers_count': row[f'{prefix}stats__followers_count'] or 0,
+        'following_count': row[f'{prefix}stats__following_count'] or 0,
+    }
+
+
+def chunks(request, rows, per_page, serialize, encode_row):
+    """Кусочки JSON страницы; ``next`` известен только после строк."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield '{"results": ['
+    last = None
+    has_more = False
+    for number, row in enumerate(rows):
+        if number == per_page:
+            has_more = True
+            break
+        if last is not None:
+            yield ', '
+        yield from encoder.iterencode(serialize(row))
+        last = row
+    next_url = None
+    if has_more:
+        query = request.GET.copy()
+        query['after'] = encode_row(last)
+        next_url = f'{request.path}?{query.urlencode()}'
+    yield '], "next": '
+    yield encoder.encode(next_url)
+    yield '}'
+
+
+def stream_page(request, queryset, serialize, paginator=CursorPaginator):
+    """Страница ``queryset`` после курсора ``?after=`` потоком JSON."""
+    per_page = limit(request)
+    after = paginator.decode(request.GET.get('after'))
+    if after is not None:
+        queryset = queryset.filter(paginator.following(*after))
+    rows = queryset.order_by(*paginator.ordering)[:per_page + 1]
+    return StreamingHttpResponse(
+        chunks(
+            request, rows.iterator(), per_page, serialize,
+            paginator.encode_row,
+        ),
+        content_type='application/json',
+    )
+
+
+@require_safe
+def index(request):
+    return stream_page(
+        request, Post.objects.values(*POST_FIELDS), serialize_post
+    )
+
+
+@require_safe
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return not_found()
+    return stream_page(
+        request,
+        Post.objects.filter(group_id=group_id).values(*POST_FIELDS),
+        serialize_post,
+    )
+
+
+@require_safe
+def profile(request, username):
+    user_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if user_id is None:
+        return not_found()
+    return stream_page(
+        request,
+        Post.objects.filter(author_id=user_id).values(*POST_FIELDS),
+        serialize_post,
+    )
+
+
+@require_safe
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Требуется авторизация.')
+    entries = FeedEntry.objects.filter(user=request.user).values(
+        'id', 'created', *(f'post__{field}' for field in POST_FIELDS)
+    )
+    return stream_page(request, entries, serialize_entry)
+
+
+@require_safe
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if row is None:
+        return not_found()
+    return JsonResponse(
+        {
+            **serialize_post(row),
+            'comments': reverse('api:post_comments', args=[post_id]),
+        },
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+@require_safe
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return not_found()
+    return stream_page(
+        request,
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        serialize_comment,
+        CommentPaginator,
+    )
+
+
+def edges_page(request, username, get_edges):
+    """Люди из рёбер ``get_edges(user)`` от новых к старым.
+
+    ``get_edges`` возвращает рёбра и конец ребра, на котором человек.
+    """
+    user = User.objects.select_related('stats').filter(
+        username=username
+    ).first()
+    if user is None:
+        return not_found()
+    edges, field = get_edges(user)
+    edges = edges.values(
+        'id', *(f'{field}__{name}' for name in PERSON_FIELDS)
+    )
+    return stream_page(
+        request,
+        edges,
+        partial(serialize_person, prefix=f'{field}__'),
+        FollowPaginator,
+    )
+
+
+@require_safe
+def followers(request, username):
+    return edges_page(
+        request, username, lambda user: (follows.followers(user), 'user')
+    )
+
+
+@require_safe
+def following(request, username):
+    return edges_page(
+        request, username, lambda user: (follows.following(user), 'author')
+    )
+
+
+@require_safe
+def mutual(request, username):
+    return edges_page(request, username, follows.mutual)
+
+
+@require_safe
+def suggestions(request):
+    """Друзья друзей вошедшего пользователя, одной страницей."""
+    if not request.user.is_authenticated:
+        return error(401, 'Требуется авторизация.')
+    rows = follows.suggested(request.user, limit(request))
+    found = {
+        row['id']: row
+        for row in User.objects.filter(
+            pk__in=[author_id for author_id, _ in rows]
+        ).values('id', *PERSON_FIELDS)
+    }
+    return JsonResponse(
+        {'results': [
+            {**serialize_person(found[author_id]), 'paths': paths}
+            for author_id, paths in rows
+            if author_id in found
+        ]},
+        json_dumps_params={'ensure_ascii': False},
+    )
@@ -0,0 +1,254 @@
+"""Кеш-бэкенды, общие для всех воркеров одного хоста.
+
+``SQLiteCache`` хранит записи в отдельном файле SQLite в режиме WAL,
+поэтому его видят все процессы gunicorn без внешних сервисов.
+``TwoLevelCache`` держит перед общим кешем короткоживущую копию в памяти
+процесса: горячие ключи не ходят в общий кеш на каждый запрос, а
+инвалидация доходит до остальных воркеров не позже ``LOCAL_TIMEOUT``.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._location = location
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(
+                self._location, timeout=30, isolation_level=None
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB, expires REAL)'
+            )
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)'
+            )
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _alive(expires):
+        return expires is None or expires > time.time()
+
+    def _write(self, db, key, value, timeout, mode):
+        db.execute(
+            f'INSERT OR {mode} INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), timeout),
+        )
+
+    def _cull(self, db):
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute(
+                'SELECT expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and self._alive(row[0]):
+                return False
+            self._write(
+                db, key, value, self.get_backend_timeout(timeout), 'REPLACE'
+            )
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._db.execute(
+            'SELECT value, expires FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or not self._alive(row[1]):
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version=version): key for key in keys}
+        if not made:
+            return {}
+        for key in made:
+            self.validate_key(key)
+        marks = ', '.join('?' * len(made))
+        rows = self._db.execute(
+            f'SELECT key, value, expires FROM cache WHERE key IN ({marks})',
+            list(made),
+        )
+        return {
+            made[key]: pickle.loads(value)
+            for key, value, expires in rows
+            if self._alive(expires)
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                self._write(db, key, value, expires, 'REPLACE')
+            if self._cull_frequency:
+                self._cull(db)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        with db:
+            cursor = db.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), key, time.time()),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        made = [self.make_key(key, version=version) for key in keys]
+        db = self._db
+        with db:
+            db.executemany(
+                'DELETE FROM cache WHERE key = ?', [(key,) for key in made]
+            )
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version) is not self
+
+    def incr(self, key, delta=1, version=None):
+        made = self.make_key(key, version=version)
+        self.validate_key(made)
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (made,)
+            ).fetchone()
+            if row is None or not self._alive(row[1]):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            self._write(db, made, value, row[1], 'REPLACE')
+        return value
+
+    def clear(self):
+        db = self._db
+        with db:
+            db.execute('DELETE FROM cache')
+
+
+class TwoLevelCache(BaseCache):
+    """Локальный LocMemCache (L1) поверх общего кеша (L2).
+
+    ``LOCATION`` — алиас общего кеша из ``CACHES``; ``LOCAL_TIMEOUT`` в
+    ``OPTIONS`` ограничивает, сколько секунд запись живёт в L1.
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        super().__init__(params)
+        self._shared_alias = location
+        self._memory = LocMemCache(f'two-level-{location}', {
+            'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)},
+        })
+
+    @property
+    def _shared(self):
+        return caches[self._shared_alias]
+
+    def _local_expiry(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._shared.default_timeout
+        if timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._shared.add(key, value, timeout, version)
+        if added:
+            self._memory.set(key, value, self._local_expiry(timeout), version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self._memory.get(key, self, version)
+        if value is not self:
+            return value
+        value = self._shared.get(key, self, version)
+        if value is self:
+            return default
+        self._memory.set(key, value, self._local_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self._memory.get_many(keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self._shared.get_many(missing, version)
+            self._memory.set_many(shared, self._local_timeout, version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._shared.set(key, value, timeout, version)
+        self._memory.set(key, value, self._local_expiry(timeout), version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._shared.set_many(data, timeout, version)
+        self._memory.set_many(data, self._local_expiry(timeout), version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._memory.delete(key, version)
+        return self._shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._memory.delete(key, version)
+        self._shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        self._memory.delete_many(keys, version)
+        self._shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version) is not self
+
+    def incr(self, key, delta=1, version=None):
+        self._memory.delete(key, version)
+        return self._shared.incr(key, delta, version)
+
+    def clear(self):
+        self._memory.clear()
+        self._shared.clear()
@@ -1,8 +1,15 @@
 import datetime
 
 
+def current_year():
+    return datetime.date.today().year
+
+
+# Шаблон вызывает функцию, только когда выводит {{ year }}: страницы без
+# подвала (админка, ошибки, фрагменты) за год не платят.
+YEAR = {'year': current_year}
+
+
 def year(request):
     """Добавляет переменную с текущим годом."""
-    return {
-        'year': datetime.date.today().year
-    }
+    return YEAR
@@ -0,0 +1,215 @@
+"""Выборочные метрики запросов для продакшена.
+
+``core.middleware.MetricsMiddleware`` измеряет долю ``METRICS_SAMPLE_RATE``
+запросов: число и время SQL (через ``execute_wrapper``), время отрисовки
+шаблонов, попадания и промахи кеша по умолчанию и полную задержку.
+Итоги копятся по имени view в памяти процесса: накопленные с запуска
+отдаёт ``snapshot()`` (страница ``/metrics/`` для staff), итоги за окно
+раз в ``METRICS_LOG_INTERVAL`` секунд пишутся в лог ``core.metrics``.
+
+Шаблоны и кеш измеряются обёртками над ``Template.render`` и методами
+``get``/``get_many`` класса кеша по умолчанию. Обёртки ставятся, только
+когда метрики включены, и вне измеряемого запроса стоят одной проверки
+thread-local.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+from .queries import wrap
+
+logger = logging.getLogger(__name__)
+
+LOG_INTERVAL = getattr(settings, 'METRICS_LOG_INTERVAL', 60)
+FIELDS = (
+    'latency', 'queries', 'sql', 'templates', 'cache_hits', 'cache_misses'
+)
+
+_local = threading.local()
+_lock = threading.Lock()
+_installed = False
+_totals = {}
+_window = {}
+_logged = time.monotonic()
+
+
+class Sample:
+    """Измерения одного запроса."""
+    __slots__ = (
+        'started', 'queries', 'sql', 'templates', 'cache_hits',
+        'cache_misses', 'rendering', 'wrapping',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.templates = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rendering = False
+        self.wrapping = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+
+def sample_rate():
+    return getattr(settings, 'METRICS_SAMPLE_RATE', 0)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        sample = getattr(_local, 'sample', None)
+        # Вложенные шаблоны (extends, include) входят во внешний.
+        if sample is None or sample.rendering:
+            return render(self, context)
+        sample.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            sample.templates += time.perf_counter() - started
+            sample.rendering = False
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        sample = getattr(_local, 'sample', None)
+        if sample is None:
+            return get(self, key, default, version)
+        value = get(self, key, _local, version)
+        if value is _local:
+            sample.cache_misses += 1
+            return default
+        sample.cache_hits += 1
+        return value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        sample = getattr(_local, 'sample', None)
+        if sample is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        found = get_many(self, keys, version)
+        sample.cache_hits += len(found)
+        sample.cache_misses += len(keys) - len(found)
+        return found
+    return wrapper
+
+
+def install():
+    """Ставит обёртки шаблонов и кеша; повторный вызов ничего не делает."""
+    global _installed
+    if _installed:
+        return
+    Template.render = _timed_render(Template.render)
+    backend = type(caches['default'])
+    backend.get = _counted_get(backend.get)
+    backend.get_many = _counted_get_many(backend.get_many)
+    _installed = True
+
+
+def start():
+    """Начинает измерение запроса в текущем потоке."""
+    sample = Sample()
+    sample.wrapping = wrap(sample.execute)
+    _local.sample = sample
+    return sample
+
+
+def finish(sample, view):
+    """Завершает измерение и добавляет его к итогам ``view``."""
+    if getattr(_local, 'sample', None) is sample:
+        _local.sample = None
+    sample.wrapping.close()
+    record(view, {
+        'latency': time.perf_counter() - sample.started,
+        'queries': sample.queries,
+        'sql': sample.sql,
+        'templates': sample.templates,
+        'cache_hits': sample.cache_hits,
+        'cache_misses': sample.cache_misses,
+    })
+
+
+def _add(stats, view, values):
+    row = stats.setdefault(
+        view, dict.fromkeys(('requests', 'latency_max', *FIELDS), 0)
+    )
+    row['requests'] += 1
+    row['latency_max'] = max(row['latency_max'], values['latency'])
+    for field in FIELDS:
+        row[field] += values[field]
+
+
+def record(view, values):
+    global _logged, _window
+    window = None
+    with _lock:
+        _add(_totals, view, values)
+        _add(_window, view, values)
+        now = time.monotonic()
+        if now - _logged >= LOG_INTERVAL:
+            window, _window, _logged = _window, {}, now
+    if window:
+        log(window)
+
+
+def summarize(stats):
+    """Средние на запрос: миллисекунды и число запросов к базе."""
+    summary = {}
+    for view, row in sorted(stats.items()):
+        count = row['requests']
+        summary[view] = {
+            'requests': count,
+            'latency_ms': round(row['latency'] / count * 1000, 3),
+            'latency_max_ms': round(row['latency_max'] * 1000, 3),
+            'queries': round(row['queries'] / count, 2),
+            'sql_ms': round(row['sql'] / count * 1000, 3),
+            'templates_ms': round(row['templates'] / count * 1000, 3),
+            'cache_hits': row['cache_hits'],
+            'cache_misses': row['cache_misses'],
+        }
+    return summary
+
+
+def log(stats):
+    for view, row in summarize(stats).items():
+        logger.info(
+            '%s: %d req, %.1f ms (max %.1f), %.1f queries / %.1f ms, '
+            'templates %.1f ms, cache %d/%d',
+            view, row['requests'], row['latency_ms'], row['latency_max_ms'],
+            row['queries'], row['sql_ms'], row['templates_ms'],
+            row['cache_hits'], row['cache_hits'] + row['cache_misses'],
+        )
+
+
+def snapshot():
+    with _lock:
+        totals = {view: dict(row) for view, row in _totals.items()}
+    return {'sample_rate': sample_rate(), 'views': summarize(totals)}
+
+
+def reset():
+    global _logged
+    with _lock:
+        _totals.clear()
+        _window.clear()
+        _logged = time.monotonic()
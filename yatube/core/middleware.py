@@ -0,0 +1,84 @@
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+from .queries import DUPLICATE_QUERY_LIMIT, SLOW_QUERY_MS, Inspector, wrap
+
+
+class OnClose:
+    """Закрываемый объект ответа: ``HttpResponse.close()`` вызовет его.
+
+    Ответ закрывается после отдачи, поэтому в измерения потоковых
+    ответов входят и запросы, выполненные при отдаче.
+    """
+
+    def __init__(self, callback):
+        self.close = callback
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else '-'
+
+
+class MetricsMiddleware:
+    """Измеряет выборку запросов; см. ``core.metrics``.
+
+    При ``METRICS_SAMPLE_RATE = 0`` отключается при загрузке, и запросы
+    через него не проходят.
+    """
+
+    def __init__(self, get_response):
+        self.rate = metrics.sample_rate()
+        if self.rate <= 0:
+            raise MiddlewareNotUsed
+        metrics.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+        sample = metrics.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            metrics.finish(sample, view_name(request))
+            raise
+        response._closable_objects.append(
+            OnClose(lambda: metrics.finish(sample, view_name(request)))
+        )
+        return response
+
+
+class QueryInspectorMiddleware:
+    """Пишет в лог повторы и медленные SQL-запросы; см. ``core.queries``.
+
+    Включается ``QUERY_INSPECTOR = True``, иначе отключается при загрузке.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR', False):
+            raise MiddlewareNotUsed
+        self.slow = getattr(settings, 'SLOW_QUERY_MS', SLOW_QUERY_MS)
+        self.duplicates = getattr(
+            settings, 'DUPLICATE_QUERY_LIMIT', DUPLICATE_QUERY_LIMIT
+        )
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = Inspector(self.slow, self.duplicates)
+        wrapping = wrap(inspector.execute)
+
+        def finish():
+            wrapping.close()
+            inspector.report(view_name(request))
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            finish()
+            raise
+        response._closable_objects.append(OnClose(finish))
+        return response
@@ -1,4 +1,13 @@
-from django.db import models
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connection, models
+
+INSERT_BATCH_SIZE = 10000
+PREPARED_TYPES = frozenset((
+    'DateTimeField', 'DateField', 'TimeField', 'DurationField',
+    'DecimalField', 'UUIDField', 'BinaryField',
+))
 
 
 class CreatedModel(models.Model):
@@ -8,3 +17,51 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+@contextmanager
+def explicit_created(model):
+    """Позволяет bulk_create сохранить заданное поле ``created``."""
+    field = model._meta.get_field('created')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def insert_rows(model, fields, rows):
+    """Вставляет кортежи значений ``fields`` пачками через executemany.
+
+    В отличие от ``bulk_create`` не создаёт экземпляры моделей и не
+    собирает SQL на каждую пачку: на миллионах строк это в несколько раз
+    быстрее. Сигналы и ``auto_now_add`` не срабатывают. Через
+    ``get_db_prep_save`` проходят только значения полей из
+    ``PREPARED_TYPES``, числа и строки уходят в базу как есть.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    prepared = [
+        (index, field) for index, field in enumerate(fields)
+        if field.get_internal_type() in PREPARED_TYPES
+    ]
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(islice(rows, INSERT_BATCH_SIZE))
+            if prepared:
+                batch = [list(row) for row in batch]
+                for row in batch:
+                    for index, field in prepared:
+                        row[index] = field.get_db_prep_save(
+                            row[index], connection
+                        )
+            if not batch:
+                break
+            cursor.executemany(
+                f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+                f'VALUES ({placeholders})',
+                batch,
+            )
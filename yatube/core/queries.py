@@ -0,0 +1,131 @@
+"""Поиск повторяющихся и медленных SQL-запросов в пределах запроса.
+
+``core.middleware.QueryInspectorMiddleware`` (включается
+``QUERY_INSPECTOR``, рассчитан на staging) ставит ``Inspector`` обёрткой
+всех соединений. Один и тот же SQL (шаблон запроса, параметры могут
+отличаться), выполненный ``DUPLICATE_QUERY_LIMIT`` и больше раз, и
+запросы дольше ``SLOW_QUERY_MS`` пишутся в лог ``core.queries`` с именем
+view, строкой шаблона, при отрисовке которой выполнился запрос, и
+кратким стеком кода проекта.
+"""
+import logging
+import os
+import sys
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = 100
+DUPLICATE_QUERY_LIMIT = 2
+STACK_DEPTH = 5
+SQL_LENGTH = 300
+
+
+def wrap(execute):
+    """Ставит ``execute`` обёрткой всех соединений до ``close()``."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(execute))
+    return stack
+
+
+def _own(filename):
+    return (
+        filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in filename
+    )
+
+
+def template_line(frame):
+    """«шаблон:строка» ближайшего отрисовываемого узла шаблона."""
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        # type(), а не isinstance: ленивые объекты (request.user) не
+        # должны вычисляться, иначе проверка сама выполнит запрос.
+        if issubclass(type(node), Node) and getattr(node, 'token', None):
+            origin = getattr(node, 'origin', None)
+            name = (origin.template_name or origin.name) if origin else '?'
+            return f'{name}:{node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+def stack_summary(frame):
+    """Последние ``STACK_DEPTH`` кадров кода проекта, снаружи внутрь."""
+    frames = [
+        summary for summary in traceback.extract_stack(frame)
+        if _own(summary.filename) and summary.filename != __file__
+    ]
+    return [
+        f'{os.path.relpath(summary.filename, settings.BASE_DIR)}:'
+        f'{summary.lineno} {summary.name}'
+        for summary in frames[-STACK_DEPTH:]
+    ]
+
+
+class Place:
+    """Где выполнился запрос: строка шаблона и стек."""
+    __slots__ = ('template', 'stack')
+
+    def __init__(self, frame):
+        self.template = template_line(frame)
+        self.stack = stack_summary(frame)
+
+    def __str__(self):
+        template = f'шаблон {self.template}; ' if self.template else ''
+        return f'{template}стек: {" <- ".join(reversed(self.stack))}'
+
+
+class Inspector:
+    """Собирает повторы и медленные запросы одного HTTP-запроса."""
+
+    def __init__(self, slow=SLOW_QUERY_MS, duplicates=DUPLICATE_QUERY_LIMIT):
+        self.slow = slow / 1000
+        self.duplicates = duplicates
+        self.counts = Counter()
+        self.params = {}
+        self.places = {}
+        self.slow_queries = []
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            # Стек снимается один раз на SQL: повторы идут из того же места.
+            if sql not in self.places:
+                self.places[sql] = Place(sys._getframe(1))
+            self.counts[sql] += 1
+            self.params.setdefault(sql, set()).add(repr(params))
+            if duration >= self.slow:
+                self.slow_queries.append(
+                    (sql, duration, Place(sys._getframe(1)))
+                )
+
+    def duplicated(self):
+        """(SQL, число выполнений, число разных параметров, место)."""
+        return [
+            (sql, count, len(self.params[sql]), self.places[sql])
+            for sql, count in self.counts.most_common()
+            if count >= self.duplicates
+        ]
+
+    def report(self, view):
+        for sql, count, distinct, place in self.duplicated():
+            logger.warning(
+                '%s: запрос выполнен %d раз (разных параметров: %d): %s; %s',
+                view, count, distinct, sql[:SQL_LENGTH], place,
+            )
+        for sql, duration, place in self.slow_queries:
+            logger.warning(
+                '%s: медленный запрос %.1f мс: %s; %s',
+                view, duration * 1000, sql[:SQL_LENGTH], place,
+            )
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import SQLiteCache
+
+TEMP_DIR = tempfile.mkdtemp()
+SHARED_LOCATION = os.path.join(TEMP_DIR, 'shared.sqlite3')
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = SQLiteCache(SHARED_LOCATION, {})
+        self.cache.clear()
+
+    def test_set_get_delete(self):
+        """Значения сохраняются, читаются и удаляются"""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_shared_between_instances(self):
+        """Запись видна другому экземпляру с тем же файлом"""
+        self.cache.set_many({'a': 1, 'b': 2})
+        other = SQLiteCache(SHARED_LOCATION, {})
+        self.assertEqual(other.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+
+    def test_expired_value_is_missing(self):
+        """Просроченная запись не возвращается"""
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+        self.assertFalse(self.cache.add('key', 'newer'))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_incr(self):
+        """incr увеличивает значение и падает на отсутствующем ключе"""
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+@override_settings(CACHES={
+    'shared': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': SHARED_LOCATION,
+    },
+    'default': {
+        'BACKEND': 'core.cache.TwoLevelCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'LOCAL_TIMEOUT': 60},
+    },
+})
+class TwoLevelCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def test_reads_through_to_shared(self):
+        """Промах L1 читает значение из общего кеша"""
+        caches['shared'].set('key', 'shared')
+        self.assertEqual(self.cache.get('key'), 'shared')
+
+    def test_local_copy_is_short_lived_snapshot(self):
+        """L1 отдаёт свою копию, пока не истёк LOCAL_TIMEOUT"""
+        self.cache.set('key', 'first')
+        caches['shared'].set('key', 'second')
+        self.assertEqual(self.cache.get('key'), 'first')
+        self.cache.delete('key')
+        self.assertIsNone(caches['shared'].get('key'))
@@ -0,0 +1,19 @@
+from unittest import mock
+
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase
+
+
+class YearTest(SimpleTestCase):
+    def render(self, source):
+        template = engines['django'].from_string(source)
+        return template.render({}, RequestFactory().get('/'))
+
+    def test_computed_only_when_read(self):
+        """Год вычисляется, только когда шаблон его выводит"""
+        with mock.patch('core.context_processors.year.datetime') as clock:
+            clock.date.today.return_value.year = 2031
+            self.assertEqual(self.render('без года'), 'без года')
+            clock.date.today.assert_not_called()
+            self.assertEqual(self.render('{{ year }}'), '2031')
+            clock.date.today.assert_called_once()
@@ -0,0 +1,64 @@
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import metrics
+from ..middleware import MetricsMiddleware
+
+
+@override_settings(METRICS_SAMPLE_RATE=1)
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='MetricsAuthor')
+        cls.admin = User.objects.create_user(
+            username='MetricsAdmin', is_staff=True
+        )
+        Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        metrics.reset()
+
+    def test_records_view(self):
+        """Запросы, шаблоны и кеш записываются по имени view"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        row = metrics.snapshot()['views']['posts:index']
+        self.assertEqual(row['requests'], 2)
+        self.assertGreater(row['queries'], 0)
+        self.assertGreater(row['templates_ms'], 0)
+        self.assertGreater(row['cache_hits'], 0)
+        self.assertGreater(row['cache_misses'], 0)
+        self.assertGreaterEqual(row['latency_max_ms'], row['latency_ms'])
+
+    def test_streaming_response(self):
+        """Запросы потокового ответа входят в его измерение"""
+        response = self.client.get(reverse('api:index'))
+        b''.join(response.streaming_content)
+        row = metrics.snapshot()['views']['api:index']
+        self.assertEqual(row['requests'], 1)
+        self.assertGreater(row['queries'], 0)
+
+    def test_endpoint_staff_only(self):
+        """Страница метрик доступна только staff"""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('metrics'))
+        data = json.loads(response.content)
+        self.assertEqual(data['sample_rate'], 1)
+        self.assertIn('metrics', data['views'])
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_disabled(self):
+        """При нулевой доле middleware не подключается"""
+        with self.assertRaises(MiddlewareNotUsed):
+            MetricsMiddleware(lambda request: None)
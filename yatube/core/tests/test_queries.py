@@ -0,0 +1,39 @@
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..queries import Inspector, wrap
+
+LOOP = Template(
+    '{% for post in posts %}\n{{ post.author.username }}\n{% endfor %}'
+)
+
+
+class QueryInspectorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(3):
+            author = User.objects.create_user(username=f'Inspected{number}')
+            Post.objects.create(text='Пост', author=author)
+
+    def test_duplicates(self):
+        """Повтор SQL с разными параметрами находится со строкой шаблона"""
+        inspector = Inspector(slow=1000, duplicates=2)
+        with wrap(inspector.execute):
+            LOOP.render(Context({'posts': Post.objects.all()}))
+        [(sql, count, distinct, place)] = inspector.duplicated()
+        self.assertIn('auth_user', sql)
+        self.assertEqual((count, distinct), (3, 3))
+        self.assertTrue(place.template.endswith(':2'))
+        self.assertIn('core/tests/test_queries.py', str(place))
+        self.assertEqual(inspector.slow_queries, [])
+
+    @override_settings(QUERY_INSPECTOR=True, SLOW_QUERY_MS=0)
+    def test_middleware_logs(self):
+        """Middleware пишет медленные запросы с именем view"""
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            Client().get(reverse('posts:index'))
+        self.assertIn('posts:index: медленный запрос', logs.output[0])
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import metrics as request_metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +15,11 @@ def csrf_failure(request, reason=''):
 
 def page_500(request, reason=''):
     return render(request, 'core/500.html', {'path': request.path}, status=500)
+
+
+@staff_member_required
+def metrics(request):
+    """Итоги выборочных метрик по view с запуска процесса."""
+    return JsonResponse(
+        request_metrics.snapshot(), json_dumps_params={'ensure_ascii': False}
+    )
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Group, Post, Comment
 
 
@@ -17,6 +18,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по поисковому индексу вместо LIKE по всей таблице."""
+        if not search.query_terms(search_term):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        posts = search.ranked(search_term).values('post_id')
+        return queryset.filter(pk__in=posts), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -0,0 +1,136 @@
+"""Кеш страниц лент с инвалидацией по событиям.
+
+Каждая лента зависит от набора «областей» (``index``, ``group:<id>``,
+``profile:<id>``, ``follow:<user_id>``, ``post:<id>``). У области есть
+версия, которая входит в ключ кеша. Сигналы меняют версии затронутых
+областей, и старые страницы просто перестают находиться, поэтому время
+жизни записей можно держать минутами без риска показать устаревшее.
+
+Область ``follow:<user_id>`` меняют только подписки самого пользователя
+и пересборка его ленты; новые посты авторов её не трогают, иначе один
+пост популярного автора стоил бы записи в кеш на каждого подписчика.
+"""
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .paginator import CursorPaginator, paginate, page_state, restore_page
+
+TIMEOUT = getattr(settings, 'FEED_CACHE_TIMEOUT', 300)
+GLOBAL_SCOPE = 'all'
+
+
+def _version_key(scope):
+    return f'feed:version:{scope}'
+
+
+def versions(scopes):
+    """Текущие версии областей; недостающие заводятся заново."""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _bump(scopes):
+    cache.set_many(
+        {_version_key(scope): uuid4().hex for scope in scopes}, None
+    )
+
+
+def invalidate(*scopes):
+    """Сбрасывает кеш областей сейчас и ещё раз после коммита.
+
+    Второй сброс закрывает гонку, в которой параллельный запрос успевает
+    закешировать данные, ещё не видящие незакоммиченное изменение.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def make_key(prefix, scopes, *parts):
+    scopes = [GLOBAL_SCOPE, *scopes]
+    raw = '|'.join([*scopes, *map(str, parts), *versions(scopes)])
+    return f'feed:{prefix}:{md5(raw.encode()).hexdigest()}'
+
+
+def page_key(request, scopes, viewer=None):
+    match = request.resolver_match
+    return make_key(
+        'page',
+        scopes,
+        match.view_name if match else '',
+        viewer or '-',
+        request.GET.urlencode(),
+    )
+
+
+def cached_page(queryset, request, per_page, scopes, viewer=None,
+                paginator_class=CursorPaginator):
+    """Страница ленты из кеша или из базы с сохранением в кеш.
+
+    ``viewer`` нужен лентам, содержимое которых зависит от того, кто
+    смотрит (лента подписок); общим лентам он только дробит кеш.
+    """
+    key = page_key(request, scopes, viewer)
+    state = cache.get(key)
+    if state is not None:
+        return restore_page(queryset, per_page, state, paginator_class)
+    page_obj = paginate(queryset, request, per_page, paginator_class)
+    cache.set(key, page_state(page_obj), TIMEOUT)
+    return page_obj
+
+
+def page_etag(request, scopes):
+    """ETag страницы: версии областей, зритель и адрес с параметрами.
+
+    CSRF-кука входит в тег, потому что токен вшит в формы страницы.
+    """
+    return quote_etag(make_key(
+        'etag',
+        scopes,
+        request.get_full_path(),
+        request.user.pk or '-',
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ))
+
+
+def conditional(get_scopes):
+    """Отвечает 304 без запуска view, пока области страницы не менялись.
+
+    ``get_scopes(request, *args, **kwargs)`` возвращает области страницы
+    или None, если их не определить (например, объекта нет) — тогда view
+    выполняется как обычно. Страница, отрисованная с неготовыми
+    миниатюрами (``request.thumbnails_pending``), ETag не получает.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = get_scopes(request, *args, **kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            etag = page_etag(request, scopes)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            pending = getattr(request, 'thumbnails_pending', False)
+            if response.status_code == 200 and not pending:
+                response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
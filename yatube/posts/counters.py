@@ -0,0 +1,127 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарным ``UPDATE ... SET x = x + 1`` в той же
+транзакции, что и сама запись. Если они всё же разойдутся с данными
+(массовые правки в обход моделей), их выправляет ``reconcile()``.
+"""
+import logging
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def change(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    """Меняет счётчик; пропавшую строку создаёт заново по реальным числам.
+
+    Запись, ради которой растёт счётчик, уже сделана в этой транзакции,
+    так что пересчёт её учитывает. При уменьшении строку не создаём:
+    так удаляются записи пользователя, которого каскадно удаляют целиком.
+    """
+    if change(UserStats.objects.filter(pk=user_id), field, delta):
+        return
+    if delta > 0 and not UserStats.objects.filter(pk=user_id).exists():
+        logger.warning('Нет счётчиков пользователя %s, пересчёт', user_id)
+        create_stats(user_id)
+
+
+def change_post(post_id, delta):
+    change(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def change_many(queryset, field, deltas):
+    """Прибавляет ``deltas[pk]`` к строкам: один UPDATE на каждое значение.
+
+    В массовой загрузке приращения почти всегда одинаковы, так что
+    запросов столько же, сколько разных значений, а не строк.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        change(queryset.filter(pk__in=pks), field, delta)
+
+
+def change_users(field, deltas):
+    change_many(UserStats.objects.all(), field, deltas)
+
+
+def change_posts(deltas):
+    change_many(Post.objects.all(), 'comments_count', deltas)
+
+
+def user_stats(user):
+    """``user.stats``; пропавшая строка заново создаётся по реальным числам.
+
+    Строку заводит сигнал регистрации, но пользователи, созданные в обход
+    моделей, до ``reconcile()`` остаются без неё.
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        user.stats = create_stats(user.pk)
+        return user.stats
+
+
+def create_stats(user_id):
+    stats, _ = UserStats.objects.get_or_create(user_id=user_id, defaults={
+        field: model.objects.filter(**{related: user_id}).count()
+        for field, (model, related) in USER_COUNTERS.items()
+    })
+    return stats
+
+
+def actual_count(model, field):
+    """Подзапрос с реальным числом строк ``model``, ссылающихся на pk."""
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _fix(queryset, field, actual):
+    drifted = queryset.annotate(actual=actual).exclude(
+        **{field: F('actual')}
+    ).values('pk')
+    return queryset.model.objects.filter(pk__in=drifted).update(
+        **{field: actual}
+    )
+
+
+def reconcile():
+    """Пересчитывает все счётчики; возвращает число исправленных строк."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    fixed = {
+        'stats': len(UserStats.objects.bulk_create(
+            UserStats(user_id=user_id) for user_id in missing
+        )),
+    }
+    for field, (model, related) in USER_COUNTERS.items():
+        fixed[field] = _fix(
+            UserStats.objects.all(), field, actual_count(model, related)
+        )
+    fixed['comments_count'] = _fix(
+        Post.objects.all(), 'comments_count', actual_count(Comment, 'post')
+    )
+    return fixed
@@ -0,0 +1,260 @@
+"""Синтетический набор данных для нагрузочных тестов и бенчмарков.
+
+Всё определяется зерном ``seed``: при одинаковых параметрах получается
+одна и та же база. Популярность пользователей распределена по Ципфу —
+от неё зависят число постов автора, комментариев к ним и подписчиков,
+поэтому граф подписок степенной. Тексты собираются из словаря с тем же
+распределением. Строки пишутся с явными pk, так что связи вычисляются
+без чтения вставленного обратно; большие таблицы идут через
+``insert_rows`` в обход ``bulk_create``.
+"""
+import random
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import insert_rows
+from . import counters, feed, search
+from .caching import GLOBAL_SCOPE, invalidate
+from .models import Comment, Follow, Group, Post
+from .transfer import reset_sequences
+
+BATCH_SIZE = 5000
+VOCABULARY = 30000
+SYLLABLES = [
+    consonant + vowel
+    for consonant in 'бвгдзклмнпрстфх'
+    for vowel in 'аеиоуы'
+]
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей')
+LAST_NAMES = ('Иванова', 'Смирнов', 'Кузнецова', 'Попов', 'Соколова')
+PASSWORD = 'dataset-password'
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+# Средний интервал между постами: миллион постов — около двух лет.
+INTERVAL = 60
+IMAGES = 16
+IMAGE_SIZE = (1200, 800)
+POST_FIELDS = (
+    'id', 'text', 'author', 'group', 'image', 'created', 'comments_count'
+)
+COMMENT_FIELDS = ('post', 'author', 'text', 'created')
+User = get_user_model()
+
+
+def word(rank):
+    """Слово словаря по рангу частоты: чем меньше ранг, тем чаще слово."""
+    letters = []
+    rank += len(SYLLABLES)
+    while rank:
+        rank, index = divmod(rank, len(SYLLABLES))
+        letters.append(SYLLABLES[index])
+    return ''.join(letters)
+
+
+def zipf(count):
+    """Накопленные веса рангов 1..count для ``random.choices``."""
+    return list(accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+class Texts:
+    """Тексты постов из словаря с распределением Ципфа."""
+    def __init__(self, rnd):
+        self.random = rnd
+        self.words = [word(rank) for rank in range(VOCABULARY)]
+        self.weights = zipf(VOCABULARY)
+
+    def __call__(self, low=8, high=20):
+        return ' '.join(self.random.choices(
+            self.words,
+            cum_weights=self.weights,
+            k=self.random.randint(low, high),
+        ))
+
+
+def source_image(seed, size=IMAGE_SIZE):
+    """JPEG-«фотография»: градиент, пятна и шум."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rnd = random.Random(seed)
+    width, height = size
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rnd.randrange(width), rnd.randrange(height)
+        diameter = rnd.randrange(width // 48, width // 6)
+        color = tuple(rnd.randrange(256) for _ in range(3))
+        draw.ellipse((x, y, x + diameter, y + diameter), fill=color)
+    image = image.filter(ImageFilter.GaussianBlur(3))
+    noise = Image.effect_noise(size, 24).convert('RGB')
+    image = Image.blend(image, noise, 0.15)
+    data = BytesIO()
+    image.save(data, 'JPEG', quality=90)
+    return data.getvalue()
+
+
+def _bulk(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            break
+        model.objects.bulk_create(batch)
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _images(rnd, count):
+    names = []
+    for number in range(count):
+        name = f'posts/dataset/{number}.jpg'
+        seed = rnd.random()
+        if not default_storage.exists(name):
+            name = default_storage.save(
+                name, ContentFile(source_image(seed))
+            )
+        names.append(name)
+    return names
+
+
+def _comments(rnd, texts, authors, popular, user_ids, first_post, count):
+    """Комментарии чаще достаются постам популярных авторов."""
+    by_author = {}
+    for number, author_id in enumerate(authors):
+        by_author.setdefault(author_id, []).append(number)
+    commented = [user_id for user_id in popular if user_id in by_author]
+    targets = rnd.choices(
+        commented, cum_weights=zipf(len(commented)), k=count
+    )
+    for author_id in targets:
+        number = rnd.choice(by_author[author_id])
+        yield (
+            first_post + number,
+            rnd.choice(user_ids),
+            texts(2, 12),
+            EPOCH + timedelta(
+                seconds=(number + 1) * INTERVAL
+                + rnd.randrange(7 * 24 * 3600)
+            ),
+        )
+
+
+def _follows(rnd, user_ids, popular, average):
+    """Рёбра подписок: полустепени исхода по Парето, цели по популярности.
+
+    Распределение Парето с показателем 2 имеет среднее ``2 * xm``,
+    поэтому ``xm = average / 2`` даёт в среднем ``average`` подписок.
+    """
+    weights = zipf(len(popular))
+    for user_id in user_ids:
+        degree = min(
+            int(rnd.paretovariate(2) * average / 2), len(user_ids) - 1
+        )
+        authors = set()
+        while len(authors) < degree:
+            authors.update(rnd.choices(
+                popular, cum_weights=weights, k=degree - len(authors)
+            ))
+            authors.discard(user_id)
+        for author_id in sorted(authors):
+            yield user_id, author_id
+
+
+def generate(posts, users=1000, groups=50, comments=0, follows=20,
+             images=0.0, feeds=10, search_index=True, seed=0,
+             log=lambda message: None):
+    """Наполняет базу синтетическими данными в одной транзакции.
+
+    ``images`` — доля постов с картинкой, ``follows`` — среднее число
+    подписок пользователя. Ленты подписок материализуются только для
+    первых ``feeds`` пользователей, остальные собирает
+    ``rebuild_feed --all``. ``log`` получает сообщения о ходе работы.
+    """
+    rnd = random.Random(seed)
+    texts = Texts(rnd)
+    with transaction.atomic():
+        first_user = _next_pk(User)
+        user_ids = list(range(first_user, first_user + users))
+        first_group = _next_pk(Group)
+        group_ids = list(range(first_group, first_group + groups))
+        first_post = _next_pk(Post)
+
+        password = make_password(PASSWORD, salt='dataset')
+        _bulk(User, (
+            User(
+                id=user_id,
+                username=f'user{user_id}',
+                first_name=FIRST_NAMES[user_id % len(FIRST_NAMES)],
+                last_name=LAST_NAMES[user_id % len(LAST_NAMES)],
+                password=password,
+            )
+            for user_id in user_ids
+        ))
+        _bulk(Group, (
+            Group(
+                id=group_id,
+                title=f'Группа {group_id}',
+                slug=f'group-{group_id}',
+                description=texts(),
+            )
+            for group_id in group_ids
+        ))
+        log(f'users: {users}, groups: {groups}')
+
+        popular = user_ids[:]
+        rnd.shuffle(popular)
+        weights = zipf(users)
+        authors = rnd.choices(popular, cum_weights=weights, k=posts)
+        pictures = _images(rnd, IMAGES) if images else []
+        insert_rows(Post, POST_FIELDS, (
+            (
+                first_post + number,
+                texts(),
+                author_id,
+                (
+                    rnd.choice(group_ids)
+                    if group_ids and rnd.random() < 2 / 3 else None
+                ),
+                rnd.choice(pictures) if rnd.random() < images else '',
+                EPOCH + timedelta(
+                    seconds=number * INTERVAL + rnd.randrange(INTERVAL)
+                ),
+                0,
+            )
+            for number, author_id in enumerate(authors)
+        ))
+        log(f'posts: {posts}')
+
+        if comments and posts:
+            insert_rows(Comment, COMMENT_FIELDS, _comments(
+                rnd, texts, authors, popular, user_ids, first_post, comments
+            ))
+            log(f'comments: {comments}')
+
+        if follows and users > 1:
+            insert_rows(
+                Follow, ('user', 'author'),
+                _follows(rnd, user_ids, popular, follows),
+            )
+            log(f'follows: {Follow.objects.count()}')
+
+        feed.rebuild_many(user_ids[:feeds])
+        counters.reconcile()
+        log(f'feeds: {min(feeds, users)}, counters reconciled')
+        if search_index:
+            search.rebuild()
+            log('search index rebuilt')
+        reset_sequences(User, Group, Post)
+        invalidate(GLOBAL_SCOPE)
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
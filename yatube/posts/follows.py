@@ -0,0 +1,144 @@
+"""Граф подписок: ребро (подписчик, автор) и пакетные вопросы о нём.
+
+Проверка ребра — один запрос по уникальному индексу ``(user, author)``,
+подписка — один INSERT, который этот индекс и защищает от повтора.
+Счётчики, лента подписчика и кеш обновляются обработчиками сигналов
+``Follow`` в ``signals``.
+
+Списки подписчиков и подписок — это рёбра ``Follow`` от новых к старым:
+их листает ``FollowPaginator`` по индексам ``(author, -id)`` и
+``(user, -id)``, а общее число берётся из ``UserStats``, без COUNT(*).
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef
+
+from . import counters
+from .models import Follow
+
+# Сколько последних подписок пользователя смотреть в поисках
+# рекомендаций и сколько подписок может быть у такого источника:
+# подписанные на тысячи авторов почти ничего не говорят о вкусе, а
+# обход их подписок стоит дороже всего остального.
+SUGGESTION_SOURCES = getattr(settings, 'SUGGESTION_SOURCES', 50)
+SUGGESTION_SOURCE_DEGREE = getattr(
+    settings, 'SUGGESTION_SOURCE_DEGREE', 1000
+)
+
+
+def is_following(user, author):
+    """Подписан ли ``user`` на ``author``; аноним и сам автор — нет."""
+    if not user.is_authenticated or user.pk == author.pk:
+        return False
+    return Follow.objects.filter(user=user, author=author).exists()
+
+
+def followed_authors(user, author_ids):
+    """Те из ``author_ids``, на кого подписан ``user``, одним запросом."""
+    author_ids = set(author_ids) - {user.pk}
+    if not user.is_authenticated or not author_ids:
+        return set()
+    return set(
+        Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True)
+    )
+
+
+def mark_followed(user, posts):
+    """Проставляет постам поля для кнопок подписки на автора.
+
+    ``can_follow`` — показывать ли кнопку (зритель вошёл и пост не его),
+    ``author_followed`` — подписан ли зритель на автора.
+    """
+    followed = followed_authors(user, (post.author_id for post in posts))
+    for post in posts:
+        post.can_follow = (
+            user.is_authenticated and post.author_id != user.pk
+        )
+        post.author_followed = post.author_id in followed
+
+
+def follow(user, author):
+    """Создаёт ребро; False, если оно уже есть или это сам автор.
+
+    Повторная подписка упирается в уникальный индекс, поэтому хватает
+    одного INSERT без предварительной проверки.
+    """
+    if user.pk == author.pk:
+        return False
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unfollow(user, author):
+    """Удаляет ребро; False, если его не было."""
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    return bool(deleted)
+
+
+def followers(user):
+    """Рёбра подписчиков ``user`` вместе с подписчиками."""
+    return Follow.objects.filter(author=user).select_related(
+        'user__stats'
+    )
+
+
+def following(user):
+    """Рёбра подписок ``user`` вместе с авторами."""
+    return Follow.objects.filter(user=user).select_related(
+        'author__stats'
+    )
+
+
+def mutual(user):
+    """Взаимные подписки ``user``: пара (рёбра, конец ребра с человеком).
+
+    Перебирается меньшая сторона по счётчикам ``UserStats`` — подписки
+    или подписчики, — а ответное ребро проверяется по уникальному
+    индексу ``(user, author)``. Цена страницы растёт с меньшей из двух
+    степеней, а не с числом подписчиков популярного автора. ``user``
+    лучше передавать с загруженным ``stats``.
+    """
+    stats = counters.user_stats(user)
+    if stats.following_count <= stats.followers_count:
+        return following(user).annotate(
+            is_mutual=Exists(Follow.objects.filter(
+                user=OuterRef('author'), author=user
+            ))
+        ).filter(is_mutual=True), 'author'
+    return followers(user).annotate(
+        is_mutual=Exists(Follow.objects.filter(
+            user=user, author=OuterRef('user')
+        ))
+    ).filter(is_mutual=True), 'user'
+
+
+def suggested(user, limit):
+    """Авторы, на которых подписаны подписки ``user``: друзья друзей.
+
+    Пары ``(author_id, paths)`` по убыванию числа путей длины два.
+    Источники — ``SUGGESTION_SOURCES`` последних подписок ``user``, у
+    которых не больше ``SUGGESTION_SOURCE_DEGREE`` подписок (по
+    ``UserStats``), поэтому запрос не зависит от размеров графа.
+    """
+    sources = following(user).filter(
+        author__stats__following_count__lte=SUGGESTION_SOURCE_DEGREE
+    ).order_by('-pk').values('author_id')[:SUGGESTION_SOURCES]
+    return list(
+        Follow.objects.filter(
+            user_id__in=sources
+        ).exclude(
+            author=user
+        ).exclude(
+            author_id__in=Follow.objects.filter(user=user).values('author')
+        ).values('author_id').annotate(
+            paths=Count('pk')
+        ).order_by('-paths', 'author_id').values_list(
+            'author_id', 'paths'
+        )[:limit]
+    )
@@ -0,0 +1,70 @@
+"""Кеш отрисованного HTML постов для лент.
+
+Один и тот же пост попадает в главную ленту, ленту группы, профиль и
+ленты подписчиков, а его разметка везде одинакова. Ключ фрагмента —
+pk поста и версия: хеш всего, от чего зависит разметка (текст,
+картинка, группа, имя автора, язык). Правка поста, замена картинки или
+смена имени автора дают новый ключ, а старая запись просто истекает,
+поэтому инвалидация не нужна.
+
+Страница собирается одним ``get_many``; рисуются только промахи, и они
+же сохраняются одним ``set_many``. Фрагменты с ещё не готовыми
+миниатюрами (``request.thumbnails_pending``) не сохраняются: их разметка
+изменится. Во фрагмент не должно попадать ничего, что зависит от
+зрителя.
+"""
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+TIMEOUT = getattr(settings, 'POST_FRAGMENT_TIMEOUT', 24 * 60 * 60)
+
+
+def version(post, *extra):
+    """Хеш полей поста, которые выводит шаблон, и параметров отрисовки."""
+    author = post.author
+    raw = '\x1f'.join(map(str, (
+        post.text,
+        post.image.name,
+        post.created.isoformat(),
+        post.group.slug if post.group_id else '',
+        author.username,
+        author.first_name,
+        author.last_name,
+        get_language(),
+        *extra,
+    )))
+    return md5(raw.encode()).hexdigest()
+
+
+def make_key(post, *extra):
+    return f'post:html:{post.pk}:{version(post, *extra)}'
+
+
+def render_many(posts, render, request=None, *extra):
+    """HTML постов в их порядке: из кеша или через ``render(post)``.
+
+    ``extra`` — параметры, от которых зависит разметка, кроме самого
+    поста (например, показывать ли ссылку на группу).
+    """
+    keys = [make_key(post, *extra) for post in posts]
+    found = cache.get_many(keys)
+    fresh = {}
+    for post, key in zip(posts, keys):
+        if key in found:
+            continue
+        if request is None:
+            # Без запроса не узнать, готовы ли миниатюры: не сохраняем.
+            found[key] = render(post)
+            continue
+        pending = getattr(request, 'thumbnails_pending', False)
+        request.thumbnails_pending = False
+        found[key] = render(post)
+        if not request.thumbnails_pending:
+            fresh[key] = found[key]
+        request.thumbnails_pending = pending or request.thumbnails_pending
+    if fresh:
+        cache.set_many(fresh, TIMEOUT)
+    return [found[key] for key in keys]
@@ -0,0 +1,100 @@
+import csv
+import json
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts import transfer
+
+
+def timestamp(value):
+    """``--since``: дата или дата со временем в ISO 8601."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки в JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help=(
+                'Какие модели выгрузить: '
+                f'{", ".join(transfer.EXPORTS)} (по умолчанию все).'
+            ),
+        )
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            default='jsonl',
+        )
+        parser.add_argument(
+            '--since',
+            type=timestamp,
+            help='Только записи, созданные начиная с этой даты (ISO 8601).',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки (по умолчанию stdout).',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=transfer.CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['models']) - set(transfer.EXPORTS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные модели: {", ".join(sorted(unknown))}'
+            )
+        names = [
+            name for name in transfer.EXPORTS
+            if not options['models'] or name in options['models']
+        ]
+        if options['format'] == 'csv' and len(names) > 1:
+            raise CommandError('В CSV выгружается одна модель за раз')
+        started = time.perf_counter()
+        output = self.stdout
+        if options['output']:
+            output = open(options['output'], 'w', newline='')
+        try:
+            count = self.export(output, names, options)
+        finally:
+            if options['output']:
+                output.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f'Выгружено строк: {count} за {elapsed:.1f} с')
+
+    def export(self, output, names, options):
+        count = 0
+        for name in names:
+            rows = transfer.export_rows(
+                name, options['since'], options['chunk_size']
+            )
+            if options['format'] == 'csv':
+                writer = csv.DictWriter(output, transfer.columns(name))
+                writer.writeheader()
+                for count, row in enumerate(rows, count + 1):
+                    writer.writerow(row)
+                continue
+            for count, row in enumerate(rows, count + 1):
+                output.write(
+                    json.dumps({'model': name, **row}, ensure_ascii=False)
+                    + '\n'
+                )
+        return count
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу воспроизводимым синтетическим набором данных: '
+        'пользователи, группы, посты, комментарии и подписки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=0)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Среднее число подписок пользователя.',
+        )
+        parser.add_argument(
+            '--images',
+            type=float,
+            default=0.0,
+            help='Доля постов с картинкой, от 0 до 1.',
+        )
+        parser.add_argument(
+            '--feeds',
+            type=int,
+            default=10,
+            help=(
+                'Для скольких первых пользователей собрать ленту подписок '
+                '(остальные — rebuild_feed --all).'
+            ),
+        )
+        parser.add_argument(
+            '--skip-search-index',
+            action='store_true',
+            help='Не строить поисковый индекс (потом rebuild_search).',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def log(message):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'[{elapsed:7.1f} с] {message}')
+
+        try:
+            dataset.generate(
+                options['posts'],
+                users=options['users'],
+                groups=options['groups'],
+                comments=options['comments'],
+                follows=options['follows'],
+                images=options['images'],
+                feeds=options['feeds'],
+                search_index=not options['skip_search_index'],
+                seed=options['seed'],
+                log=log,
+            )
+        except IntegrityError as error:
+            raise CommandError(
+                f'Набор пересекается с данными в базе: {error}'
+            )
+        log('готово')
@@ -0,0 +1,79 @@
+import json
+import sys
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает выгрузку export_yatube в формате JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл JSONL или «-» для чтения из stdin.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=transfer.BATCH_SIZE,
+            help='Сколько строк вставлять за один bulk_create.',
+        )
+        parser.add_argument(
+            '--skip-signals',
+            action='store_true',
+            help=(
+                'Не обновлять счётчики, ленты, поиск и кеш. После загрузки '
+                'запустите reconcile_counters, rebuild_feed --all и '
+                'rebuild_search.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            self.load(sys.stdin, options)
+        else:
+            with open(options['path']) as source:
+                self.load(source, options)
+
+    def load(self, source, options):
+        rows = (json.loads(line) for line in source if line.strip())
+        loaded = Counter()
+        skipped = Counter()
+        total = 0
+        started = time.perf_counter()
+        try:
+            for name, read, count in transfer.import_rows(
+                rows,
+                options['batch_size'],
+                side_effects=not options['skip_signals'],
+            ):
+                loaded[name] += count
+                skipped[name] += read - count
+                total += read
+                if options['verbosity'] > 1:
+                    elapsed = time.perf_counter() - started
+                    self.stderr.write(
+                        f'{name}: {total} строк, '
+                        f'{total / elapsed:.0f} строк/с'
+                    )
+        except (KeyError, ValueError) as error:
+            raise CommandError(f'Неверная строка выгрузки: {error}')
+        except IntegrityError as error:
+            raise CommandError(
+                f'Выгрузка противоречит данным в базе: {error}'
+            )
+        elapsed = time.perf_counter() - started
+        for name, count in loaded.items():
+            line = f'{name}: загружено {count}'
+            if skipped[name]:
+                line += f', пропущено {skipped[name]}'
+            self.stdout.write(line)
+        self.stdout.write(
+            f'Прочитано строк: {total} за {elapsed:.1f} с, '
+            f'{total / max(elapsed, 1e-9):.0f} строк/с'
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов с нуля.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search.BATCH_SIZE,
+            help='Сколько строк индекса записывать за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = search.rebuild(options['batch_size'])
+        self.stdout.write(f'Проиндексировано постов: {count}')
@@ -0,0 +1,74 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:38
+
+from collections import Counter
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия posts.search.tokenize на момент миграции: изменения токенизатора
+# не должны менять то, что строит эта миграция.
+WORD = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+BATCH_SIZE = 50000
+STOP_WORDS = frozenset((
+    'без', 'был', 'была', 'были', 'было', 'быть', 'вам', 'вас', 'все',
+    'всё', 'где', 'для', 'его', 'ее', 'её', 'если', 'есть', 'еще', 'ещё',
+    'же', 'за', 'из', 'или', 'им', 'их', 'как', 'когда', 'ли', 'мы', 'на',
+    'над', 'не', 'него', 'нет', 'ни', 'но', 'ну', 'об', 'он', 'она',
+    'они', 'оно', 'от', 'по', 'под', 'при', 'про', 'с', 'со', 'так', 'там',
+    'то', 'тот', 'ты', 'уже', 'чем', 'что', 'это', 'эта', 'этот', 'я',
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+
+def tokenize(text):
+    return [
+        word for word in WORD.findall(text.lower().replace('ё', 'е'))
+        if 1 < len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS
+    ]
+
+
+def fill_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    batch = []
+    posts = Post.objects.order_by().values_list('id', 'text')
+    for post_id, text in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.extend(
+            SearchTerm(term=term, post_id=post_id, weight=weight)
+            for term, weight in Counter(tokenize(text)).items()
+        )
+        if len(batch) >= BATCH_SIZE:
+            SearchTerm.objects.bulk_create(batch)
+            batch = []
+    SearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post', 'weight'], name='posts_searc_term_d1c62c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'weight', 'post'], name='posts_searc_term_c7f9bc_idx'),
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
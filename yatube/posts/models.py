@@ -1,9 +1,20 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+
 from core.models import CreatedModel
 
 User = get_user_model()
 
+FEED_FIELDS = (
+    'text',
+    'created',
+    'image',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -14,6 +25,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних полей."""
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+
 class Post(CreatedModel):
     text = models.TextField()
     author = models.ForeignKey(
@@ -35,12 +52,20 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return f'{self.text[:15]}'
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['-created', '-id']),
+            models.Index(fields=['author', '-created', '-id']),
+            models.Index(fields=['group', '-created', '-id']),
+        ]
 
 
 class Comment(CreatedModel):
@@ -56,6 +81,11 @@ class Comment(CreatedModel):
     )
     text = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created', 'id']),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -68,3 +98,83 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE,
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['author', '-id']),
+            models.Index(fields=['user', '-id']),
+        ]
+
+
+class FeedEntryQuerySet(models.QuerySet):
+    def feed(self):
+        """Записи ленты вместе с постами, подготовленными как Post.feed()."""
+        return self.select_related(
+            'post__author', 'post__group'
+        ).only('created', *(f'post__{field}' for field in FEED_FIELDS))
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: пост автора в ленте подписчика."""
+    user = models.ForeignKey(
+        User,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+    )
+    created = models.DateTimeField()
+
+    objects = FeedEntryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created', '-id']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживаются при записи."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class SearchTerm(models.Model):
+    """Слово поста в поисковом индексе и число его вхождений в текст."""
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        related_name='search_terms',
+        on_delete=models.CASCADE,
+    )
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post', 'weight']),
+            models.Index(fields=['term', 'weight', 'post']),
+        ]
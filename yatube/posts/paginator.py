@@ -0,0 +1,215 @@
+"""Пагинация по ключу ``(created, pk)``.
+
+Вместо ``COUNT(*)`` и ``OFFSET n`` страница выбирается условием по ключу
+последней показанной записи, поэтому глубокие страницы стоят столько же,
+сколько первая. Ссылки на соседние страницы несут непрозрачный курсор
+``?after=`` / ``?before=``; старые адреса ``?page=N`` продолжают работать.
+"""
+from math import ceil
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+ORDERING = ('-created', '-pk')
+
+
+def make_cursor(created, pk):
+    raw = f'{created.isoformat()},{pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def encode_cursor(obj):
+    return make_cursor(obj.created, obj.pk)
+
+
+def encode_row_cursor(row):
+    """Курсор строки ``values()`` с полями ``created`` и ``id``."""
+    return make_cursor(row['created'], row['id'])
+
+
+def decode_cursor(token):
+    """Возвращает пару (created, pk) или None для битого курсора."""
+    if not token:
+        return None
+    try:
+        created, pk = urlsafe_base64_decode(token).decode().split(',')
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    if created is None:
+        return None
+    return created, pk
+
+
+def older(created, pk):
+    """Условие «после курсора» в порядке ORDERING.
+
+    Внешнее ``created <= ...`` даёт планировщику диапазон по индексу
+    ``(..., -created, -id)`` вместо объединения двух поисков через OR.
+    """
+    return Q(created__lte=created) & (
+        Q(created__lt=created) | Q(pk__lt=pk)
+    )
+
+
+def newer(created, pk):
+    return Q(created__gte=created) & (
+        Q(created__gt=created) | Q(pk__gt=pk)
+    )
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор, который не считает общее число записей.
+
+    ``number`` и ``num_pages`` описывают только соседство текущей
+    страницы: есть ли что-то до неё и после неё. Подклассы с другим
+    ключом сортировки переопределяют ``ordering`` и условия
+    ``following`` / ``preceding`` («после курсора» и «до курсора»).
+    """
+    ordering = ORDERING
+    encode = staticmethod(encode_cursor)
+    encode_row = staticmethod(encode_row_cursor)
+    decode = staticmethod(decode_cursor)
+    following = staticmethod(older)
+    preceding = staticmethod(newer)
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+        self.number = 1
+        self.has_more = False
+
+    @property
+    def num_pages(self):
+        return self.number + 1 if self.has_more else self.number
+
+    def _page(self, rows):
+        return self._get_page(rows, self.number, self)
+
+    def _fetch(self, queryset):
+        rows = list(queryset[:self.per_page + 1])
+        return rows[:self.per_page], len(rows) > self.per_page
+
+    def cursor_page(self, after=None, before=None):
+        queryset = self.object_list
+        if before is not None:
+            rows, has_newer = self._fetch(
+                queryset.filter(self.preceding(*before)).reverse()
+            )
+            if not rows:
+                # Новее курсора ничего нет: это первая страница.
+                return self.cursor_page()
+            rows.reverse()
+            self.number = 2 if has_newer else 1
+            self.has_more = True
+            return self._page(rows)
+        if after is not None:
+            queryset = queryset.filter(self.following(*after))
+            self.number = 2
+        rows, self.has_more = self._fetch(queryset)
+        return self._page(rows)
+
+    def offset_page(self, number):
+        """Совместимость со ссылками вида ?page=N."""
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        bottom = (number - 1) * self.per_page
+        rows, self.has_more = self._fetch(self.object_list[bottom:])
+        if not rows and number > 1:
+            last = max(ceil(self.count / self.per_page), 1)
+            return self.offset_page(last)
+        self.number = number
+        return self._page(rows)
+
+
+class CommentPaginator(CursorPaginator):
+    """Комментарии идут от старых к новым."""
+    ordering = ('created', 'pk')
+    following = staticmethod(newer)
+    preceding = staticmethod(older)
+
+
+def make_pk_cursor(pk):
+    return urlsafe_base64_encode(str(pk).encode())
+
+
+def decode_pk_cursor(token):
+    """Возвращает кортеж (pk,) или None для битого курсора."""
+    if not token:
+        return None
+    try:
+        return (int(urlsafe_base64_decode(token).decode()),)
+    except (TypeError, ValueError):
+        return None
+
+
+class FollowPaginator(CursorPaginator):
+    """Подписки от новых к старым по ключу ``pk``.
+
+    У подписки нет даты, но ``pk`` растёт с каждой новой, а индексы
+    ``(author, -id)`` и ``(user, -id)`` отдают страницу подписчиков или
+    подписок одним диапазоном, сколько бы их ни было у пользователя.
+    """
+    ordering = ('-pk',)
+    encode = staticmethod(lambda obj: make_pk_cursor(obj.pk))
+    encode_row = staticmethod(lambda row: make_pk_cursor(row['id']))
+    decode = staticmethod(decode_pk_cursor)
+    following = staticmethod(lambda pk: Q(pk__lt=pk))
+    preceding = staticmethod(lambda pk: Q(pk__gt=pk))
+
+
+def _query(request, **params):
+    query = request.GET.copy()
+    for key in ('page', 'after', 'before'):
+        query.pop(key, None)
+    query.update(params)
+    return query.urlencode()
+
+
+def paginate(queryset, request, per_page, paginator_class=CursorPaginator):
+    paginator = paginator_class(queryset, per_page)
+    if 'page' in request.GET:
+        page_obj = paginator.offset_page(request.GET['page'])
+    else:
+        page_obj = paginator.cursor_page(
+            after=paginator.decode(request.GET.get('after')),
+            before=paginator.decode(request.GET.get('before')),
+        )
+    page_obj.first_query = _query(request)
+    page_obj.previous_query = page_obj.next_query = ''
+    if page_obj.object_list:
+        page_obj.previous_query = _query(
+            request, before=paginator.encode(page_obj.object_list[0])
+        )
+        page_obj.next_query = _query(
+            request, after=paginator.encode(page_obj.object_list[-1])
+        )
+    return page_obj
+
+
+def page_state(page_obj):
+    """Состояние страницы, которое можно положить в кеш."""
+    return {
+        'object_list': list(page_obj.object_list),
+        'number': page_obj.number,
+        'has_more': page_obj.paginator.has_more,
+        'first_query': page_obj.first_query,
+        'previous_query': page_obj.previous_query,
+        'next_query': page_obj.next_query,
+    }
+
+
+def restore_page(queryset, per_page, state, paginator_class=CursorPaginator):
+    """Собирает страницу из page_state() без запросов к базе."""
+    paginator = paginator_class(queryset, per_page)
+    paginator.number = state['number']
+    paginator.has_more = state['has_more']
+    page_obj = paginator._page(state['object_list'])
+    page_obj.first_query = state['first_query']
+    page_obj.previous_query = state['previous_query']
+    page_obj.next_query = state['next_query']
+    return page_obj
@@ -0,0 +1,203 @@
+"""Полнотекстовый поиск по постам.
+
+Инвертированный индекс хранится в таблице SearchTerm: слово, пост и
+число вхождений слова в текст. Сигналы обновляют индекс при создании и
+правке поста, ``manage.py rebuild_search`` строит его заново. Найденные
+посты содержат все слова запроса и ранжируются по tf-idf; страницы
+выбираются курсором по ключу ``(score, post)``.
+"""
+import math
+import re
+from collections import Counter
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from core.models import insert_rows
+from .models import Post, SearchTerm
+from .paginator import CursorPaginator
+
+WORD = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+BATCH_SIZE = 50000
+FREQUENCY_TIMEOUT = 10 * 60
+STOP_WORDS = frozenset((
+    'без', 'был', 'была', 'были', 'было', 'быть', 'вам', 'вас', 'все',
+    'всё', 'где', 'для', 'его', 'ее', 'её', 'если', 'есть', 'еще', 'ещё',
+    'же', 'за', 'из', 'или', 'им', 'их', 'как', 'когда', 'ли', 'мы', 'на',
+    'над', 'не', 'него', 'нет', 'ни', 'но', 'ну', 'об', 'он', 'она',
+    'они', 'оно', 'от', 'по', 'под', 'при', 'про', 'с', 'со', 'так', 'там',
+    'то', 'тот', 'ты', 'уже', 'чем', 'что', 'это', 'эта', 'этот', 'я',
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+
+def tokenize(text):
+    """Слова текста в нормализованном виде, стоп-слова отброшены."""
+    return [
+        word for word in WORD.findall(text.lower().replace('ё', 'е'))
+        if 1 < len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS
+    ]
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def _rows(post_id, text):
+    return [
+        (term, post_id, weight)
+        for term, weight in Counter(tokenize(text)).items()
+    ]
+
+
+def _insert(rows):
+    insert_rows(SearchTerm, ('term', 'post', 'weight'), rows)
+
+
+def index_post(post):
+    """Переиндексирует текст одного поста."""
+    SearchTerm.objects.filter(post_id=post.pk).delete()
+    _insert(_rows(post.pk, post.text))
+
+
+def index_posts(posts):
+    """Индексирует пачку новых постов, которых ещё нет в индексе."""
+    _insert([row for post in posts for row in _rows(post.pk, post.text)])
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Строит индекс заново; возвращает число проиндексированных постов.
+
+    Вызывается внутри транзакции (``rebuild_search``, ``dataset``):
+    строки пишутся пачками по ``batch_size`` многострочными INSERT.
+    """
+    SearchTerm.objects.all().delete()
+    posts = Post.objects.order_by().values_list('pk', 'text')
+    batch = []
+    count = 0
+    for post_id, text in posts.iterator(chunk_size=batch_size):
+        batch.extend(_rows(post_id, text))
+        count += 1
+        if len(batch) >= batch_size:
+            _insert(batch)
+            batch = []
+    _insert(batch)
+    return count
+
+
+def _frequency_key(term):
+    return f'search:posts:{md5(term.encode()).hexdigest()}'
+
+
+def frequencies(terms):
+    """Число постов с каждым из слов ``terms``, которые есть в индексе.
+
+    Подсчёт частого слова стоит десятки миллисекунд, а для idf и выбора
+    самого редкого слова хватает значения минутной давности, поэтому
+    найденные числа кешируются. Отсутствующие слова не кешируются, чтобы
+    новый пост с ними находился сразу.
+    """
+    keys = {_frequency_key(term): term for term in terms}
+    found = {keys[key]: posts for key, posts in cache.get_many(keys).items()}
+    missing = [term for term in terms if term not in found]
+    if missing:
+        counted = dict(
+            SearchTerm.objects.filter(term__in=missing).values(
+                'term'
+            ).annotate(posts=Count('post')).values_list('term', 'posts')
+        )
+        cache.set_many(
+            {_frequency_key(term): posts for term, posts in counted.items()},
+            FREQUENCY_TIMEOUT,
+        )
+        found.update(counted)
+    return found
+
+
+def _idf(found):
+    """Целые веса idf слов.
+
+    Число постов берётся по наибольшему pk: для idf хватает оценки, а
+    COUNT(*) по таблице постов стоит дороже самого поиска.
+    """
+    total = Post.objects.order_by('-pk').values_list('pk', flat=True)[0]
+    return {
+        term: round(1000 * math.log(1 + total / posts))
+        for term, posts in found.items()
+    }
+
+
+def _weight(term):
+    """Число вхождений слова в пост текущей строки или NULL."""
+    return Subquery(SearchTerm.objects.filter(
+        term=term, post_id=OuterRef('post_id')
+    ).values('weight')[:1])
+
+
+def ranked(query):
+    """Строки ``{'post_id': ..., 'score': ...}`` постов со всеми словами.
+
+    Кандидаты берутся из постов самого редкого слова, остальные слова
+    проверяются для них поиском по индексу ``(term, post)``, а не
+    просмотром всех постов частых слов. Для одного слова порядок по
+    tf-idf совпадает с порядком по числу вхождений, и страница читается
+    прямо из индекса ``(term, weight, post)``.
+    """
+    terms = query_terms(query)
+    found = frequencies(terms) if terms else {}
+    if not terms or len(found) < len(terms):
+        return SearchTerm.objects.none().values('post_id').annotate(
+            score=F('weight'),
+        )
+    rarest = min(terms, key=found.get)
+    rows = SearchTerm.objects.filter(term=rarest)
+    if len(terms) == 1:
+        return rows.values('post_id').annotate(score=F('weight'))
+    idf = _idf(found)
+    score = F('weight') * idf[rarest]
+    for number, term in enumerate(terms):
+        if term == rarest:
+            continue
+        name = f'weight_{number}'
+        rows = rows.annotate(**{name: _weight(term)}).filter(
+            **{f'{name}__isnull': False}
+        )
+        score = score + F(name) * idf[term]
+    return rows.annotate(score=score).values('post_id', 'score')
+
+
+def encode_cursor(row):
+    raw = f'{row["score"]},{row["post_id"]}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        score, post = urlsafe_base64_decode(token).decode().split(',')
+        return int(score), int(post)
+    except (TypeError, ValueError):
+        return None
+
+
+def lower(score, post):
+    return Q(score__lte=score) & (Q(score__lt=score) | Q(post_id__lt=post))
+
+
+def higher(score, post):
+    return Q(score__gte=score) & (Q(score__gt=score) | Q(post_id__gt=post))
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная пагинация результатов поиска по ``(score, post)``."""
+    ordering = ('-score', '-post_id')
+    encode = staticmethod(encode_cursor)
+    decode = staticmethod(decode_cursor)
+    following = staticmethod(lower)
+    preceding = staticmethod(higher)
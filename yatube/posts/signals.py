@@ -0,0 +1,148 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed, search
+from .caching import GLOBAL_SCOPE, invalidate
+from .models import Comment, Follow, Group, Post, UserStats
+from .thumbnails import pipeline
+
+User = get_user_model()
+
+
+def post_scopes(post, group_ids=()):
+    """Области кеша, в которых показывается пост.
+
+    Ленты подписчиков сюда не входят: их ETag зависит от ``index``, а
+    число подписчиков автора не должно множить записи в кеш.
+    """
+    return [
+        'index',
+        f'profile:{post.author_id}',
+        *(f'group:{group_id}' for group_id in group_ids if group_id),
+    ]
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    old = (None, '', None)
+    if instance.pk:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image', 'text'
+        ).first() or old
+    instance._old_group_id, instance._old_image, instance._old_text = old
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, 'posts_count', 1)
+        feed.fan_out_post(instance)
+    if instance.text != getattr(instance, '_old_text', None):
+        search.index_post(instance)
+    invalidate(*post_scopes(
+        instance,
+        (instance.group_id, getattr(instance, '_old_group_id', None)),
+    ))
+    invalidate(f'post:{instance.pk}')
+    image = instance.image.name
+    if image and image != getattr(instance, '_old_image', ''):
+        transaction.on_commit(lambda: pipeline.submit(image))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    invalidate(*post_scopes(instance, (instance.group_id,)))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post(instance.post_id, 1)
+    invalidate(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+    invalidate(f'post:{instance.post_id}')
+
+
+def follow_counters(follow, delta):
+    counters.change_user(follow.author_id, 'followers_count', delta)
+    counters.change_user(follow.user_id, 'following_count', delta)
+
+
+def follow_scopes(follow):
+    """Лента подписчика и профили обоих: на них видны счётчики подписок."""
+    return [
+        f'follow:{follow.user_id}',
+        f'profile:{follow.user_id}',
+        f'profile:{follow.author_id}',
+    ]
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        follow_counters(instance, 1)
+        feed.add_author(instance.user_id, instance.author_id)
+        invalidate(*follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_counters(instance, -1)
+    feed.remove_author(instance.user_id, instance.author_id)
+    invalidate(*follow_scopes(instance))
+
+
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def user_scopes(user):
+    """Области, где видно имя пользователя: его посты, комментарии, шапка."""
+    groups = Post.objects.filter(
+        author=user, group__isnull=False
+    ).values_list('group_id', flat=True).distinct()
+    commented = Comment.objects.filter(author=user).values_list(
+        'post_id', flat=True
+    ).distinct()
+    return [
+        'index',
+        f'profile:{user.pk}',
+        f'follow:{user.pk}',
+        *(f'group:{group_id}' for group_id in groups),
+        *(f'post:{post_id}' for post_id in commented),
+    ]
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields, **kwargs):
+    instance._old_names = None
+    if instance.pk and (
+        update_fields is None
+        or not update_fields.isdisjoint(USER_NAME_FIELDS)
+    ):
+        instance._old_names = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*USER_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+        return
+    old = getattr(instance, '_old_names', None)
+    names = tuple(getattr(instance, field) for field in USER_NAME_FIELDS)
+    if old is not None and old != names:
+        invalidate(*user_scopes(instance))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        invalidate(GLOBAL_SCOPE)
@@ -0,0 +1,16 @@
+from django import template
+
+from ..thumbnails import SIZE, picture
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html', takes_context=True)
+def post_picture(context, image):
+    picture_context = picture(image)
+    picture_context['sizes'] = f'(max-width: {SIZE[0]}px) 100vw, {SIZE[0]}px'
+    request = context.get('request')
+    if request is not None and not picture_context['ready']:
+        # Разметка изменится, когда миниатюры будут готовы: ETag не нужен.
+        request.thumbnails_pending = True
+    return picture_context
@@ -0,0 +1,33 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import fragments
+
+register = template.Library()
+
+POST_TEMPLATE = 'posts/includes/post.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_list(context, posts, group_links=True):
+    """Пары (пост, HTML поста, отрисованный через ``POST_TEMPLATE``).
+
+    ``{% post_list page_obj as fragments %}`` и затем цикл
+    ``{% for post, fragment in fragments %}``: фрагмент общий для всех
+    зрителей, а зависящее от зрителя (кнопка подписки) выводится рядом.
+    Готовые фрагменты берутся из кеша одним запросом
+    (``posts.fragments``); промахи рисуются шаблоном поста так же, как
+    ``{% include %}``: ``Template.render`` со своим состоянием отрисовки
+    на каждый пост.
+    """
+    post_template = context.template.engine.get_template(POST_TEMPLATE)
+
+    def render(post):
+        with context.push(post=post, group_links=group_links):
+            return mark_safe(post_template.render(context))
+
+    posts = list(posts)
+    html = fragments.render_many(
+        posts, render, context.get('request'), group_links
+    )
+    return list(zip(posts, html))
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='CounterReader')
+        cls.author = User.objects.create_user(username='CounterAuthor')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Создание и удаление постов и комментариев меняет счётчики"""
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Пост'}
+        )
+        post = Post.objects.get(author=self.user)
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Comment.objects.get(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+
+    def test_edit_keeps_comments_count(self):
+        """Правка поста не перезаписывает счётчик комментариев"""
+        post = Post.objects.create(text='Пост', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+                {'text': 'Правка'},
+            )
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('comments_count', updates[0])
+
+    def test_missing_stats_recreated(self):
+        """Без строки счётчиков она создаётся заново при новой записи"""
+        Post.objects.create(text='Первый', author=self.user)
+        UserStats.objects.filter(user=self.user).delete()
+        with self.assertLogs('posts.counters', 'WARNING'):
+            Post.objects.create(text='Второй', author=self.user)
+        self.assertEqual(self.stats(self.user).posts_count, 2)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обоих пользователей"""
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_reconcile_counters(self):
+        """reconcile_counters исправляет разошедшиеся счётчики"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        UserStats.objects.all().update(posts_count=7, followers_count=0)
+        UserStats.objects.filter(user=self.user).delete()
+        Post.objects.filter(pk=post.pk).update(comments_count=3)
+        call_command('reconcile_counters', stdout=StringIO())
+        author = self.stats(self.author)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
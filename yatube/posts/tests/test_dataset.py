@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from .. import counters, dataset
+from ..models import Comment, FeedEntry, Follow, Group, Post, SearchTerm, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+OPTIONS = {
+    'users': 30,
+    'groups': 3,
+    'comments': 50,
+    'follows': 5,
+    'images': 0.5,
+    'feeds': 30,
+}
+
+
+def snapshot():
+    return (
+        list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug', 'image', 'created'
+        )),
+        list(Comment.objects.order_by('pk').values_list(
+            'post_id', 'author__username', 'text', 'created'
+        )),
+        sorted(Follow.objects.values_list(
+            'user__username', 'author__username'
+        )),
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class DatasetTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_generate(self):
+        """Набор согласован: счётчики, ленты и поисковый индекс"""
+        dataset.generate(200, seed=1, **OPTIONS)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')
+        ).exists())
+        self.assertFalse(any(counters.reconcile().values()))
+        user = Follow.objects.first().user
+        self.assertEqual(
+            FeedEntry.objects.filter(user=user).count(),
+            Post.objects.filter(author__following__user=user).count(),
+        )
+        self.assertTrue(SearchTerm.objects.exists())
+
+    def test_deterministic(self):
+        """Одинаковое зерно даёт одинаковые данные, другое — другие"""
+        dataset.generate(100, seed=7, **OPTIONS)
+        first = snapshot()
+        for model in (Comment, Post, Follow, Group, User):
+            model.objects.all().delete()
+        dataset.generate(100, seed=7, **OPTIONS)
+        self.assertEqual(snapshot(), first)
+        for model in (Comment, Post, Follow, Group, User):
+            model.objects.all().delete()
+        dataset.generate(100, seed=8, **OPTIONS)
+        self.assertNotEqual(snapshot(), first)
+
+    def test_command(self):
+        """generate_yatube наполняет базу"""
+        call_command(
+            'generate_yatube', '--posts', '20', '--users', '5',
+            '--skip-search-index', stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertFalse(SearchTerm.objects.exists())
@@ -0,0 +1,54 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import FeedEntry, Follow, Post, User
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='FeedReader')
+        cls.author = User.objects.create_user(username='FeedAuthor')
+        cls.old_post = Post.objects.create(
+            text='Старый пост',
+            author=cls.author,
+        )
+
+    def feed_posts(self):
+        return [
+            entry.post for entry in FeedEntry.objects.filter(user=self.user)
+        ]
+
+    def test_follow_fills_feed(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора"""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.feed_posts(), [self.old_post])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.feed_posts(), [post, self.old_post])
+
+    def test_unfollow_clears_feed(self):
+        """Отписка убирает посты автора из ленты"""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        follow.delete()
+        self.assertEqual(self.feed_posts(), [])
+
+    def test_rebuild_feed_command(self):
+        """Команда rebuild_feed восстанавливает ленту по подпискам"""
+        Follow.objects.create(user=self.user, author=self.author)
+        FeedEntry.objects.all().delete()
+        with mock.patch(
+            'posts.management.commands.rebuild_feed.invalidate'
+        ) as invalidate:
+            call_command(
+                'rebuild_feed', self.user.username, stdout=StringIO()
+            )
+        self.assertEqual(self.feed_posts(), [self.old_post])
+        invalidate.assert_called_once_with(f'follow:{self.user.pk}')
@@ -0,0 +1,147 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow, Post, User, UserStats
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='GraphReader')
+        cls.other = User.objects.create_user(username='GraphOther')
+        cls.authors = [
+            User.objects.create_user(username=f'GraphAuthor{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Post.objects.create(text=f'Пост {author}', author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_edge(self):
+        """Подписка и отписка меняют только ребро зрителя"""
+        author = self.authors[0]
+        Follow.objects.create(user=self.other, author=author)
+        self.assertTrue(follows.follow(self.reader, author))
+        self.assertFalse(follows.follow(self.reader, author))
+        self.assertFalse(follows.follow(author, author))
+        self.assertTrue(follows.is_following(self.reader, author))
+        self.assertTrue(follows.unfollow(self.reader, author))
+        self.assertFalse(follows.unfollow(self.reader, author))
+        self.assertFalse(follows.is_following(self.reader, author))
+        self.assertTrue(follows.is_following(self.other, author))
+
+    def test_followed_authors_single_query(self):
+        """Подписки на авторов страницы ищутся одним запросом"""
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        ids = [author.pk for author in self.authors] + [self.reader.pk]
+        with self.assertNumQueries(1):
+            followed = follows.followed_authors(self.reader, ids)
+        self.assertEqual(followed, {self.authors[1].pk})
+
+    def test_profile_following_is_per_viewer(self):
+        """Профиль показывает подписку зрителя, а не чужую"""
+        author = self.authors[0]
+        Follow.objects.create(user=self.other, author=author)
+        address = reverse('posts:profile', args=[author.username])
+        response = self.client.get(address)
+        self.assertFalse(response.context['following'])
+        Follow.objects.create(user=self.reader, author=author)
+        response = self.client.get(address)
+        self.assertTrue(response.context['following'])
+
+    def test_feed_follow_buttons(self):
+        """Кнопка у поста ленты зависит от подписки зрителя на автора"""
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Отписаться от GraphAuthor0')
+        self.assertContains(response, 'Подписаться на GraphAuthor1')
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Подписаться на')
+
+
+class FollowListsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username='ListStar')
+        cls.fans = [
+            User.objects.create_user(username=f'ListFan{number}')
+            for number in range(25)
+        ]
+        for fan in cls.fans:
+            Follow.objects.create(user=fan, author=cls.star)
+        # Звезда подписана в ответ на каждого пятого поклонника.
+        for fan in cls.fans[::5]:
+            Follow.objects.create(user=cls.star, author=fan)
+        cls.hub = User.objects.create_user(username='ListHub')
+        Follow.objects.create(user=cls.fans[0], author=cls.hub)
+        Follow.objects.create(user=cls.fans[5], author=cls.hub)
+        Follow.objects.create(user=cls.fans[10], author=cls.fans[1])
+
+    def walk(self, address):
+        """Имена людей со всех страниц по ссылкам «Следующая»."""
+        names = []
+        client = Client()
+        response = client.get(address)
+        while True:
+            people = response.context['people']
+            names += [person.username for person in people]
+            page_obj = response.context['page_obj']
+            if not page_obj.has_next():
+                return names
+            response = client.get(f'{address}?{page_obj.next_query}')
+
+    def test_lists(self):
+        """Списки листаются от новых подписок к старым без повторов"""
+        fans = [fan.username for fan in reversed(self.fans)]
+        followed = [f'ListFan{number}' for number in (20, 15, 10, 5, 0)]
+        lists = {
+            reverse('posts:followers', args=[self.star.username]): fans,
+            reverse('posts:following', args=[self.star.username]): followed,
+            reverse('posts:mutual', args=[self.star.username]): followed,
+            # Подписок больше, чем подписчиков: перебираются подписчики.
+            reverse('posts:mutual', args=['ListFan0']): ['ListStar'],
+        }
+        for address, expected in lists.items():
+            with self.subTest(address=address):
+                self.assertEqual(self.walk(address), expected)
+
+    def test_totals_from_stats(self):
+        """Общее число берётся из счётчиков, без COUNT(*)"""
+        address = reverse('posts:followers', args=[self.star.username])
+        with self.assertNumQueries(2):
+            response = Client().get(address)
+        self.assertEqual(response.context['total'], 25)
+        self.assertEqual(len(response.context['people']), 20)
+
+    def test_missing_stats(self):
+        """Без строки счётчиков она создаётся заново по реальным числам"""
+        for name in ('profile', 'followers', 'following', 'mutual'):
+            address = reverse(f'posts:{name}', args=[self.star.username])
+            with self.subTest(address=address):
+                UserStats.objects.filter(user=self.star).delete()
+                response = Client().get(address)
+                self.assertEqual(response.status_code, 200)
+        stats = UserStats.objects.get(user=self.star)
+        self.assertEqual(stats.followers_count, 25)
+        self.assertEqual(stats.following_count, 5)
+
+    def test_suggestions(self):
+        """Рекомендации — авторы подписок, по числу путей к ним"""
+        client = Client()
+        client.force_login(self.star)
+        response = client.get(reverse('posts:suggestions'))
+        people = response.context['people']
+        self.assertEqual(
+            [(person.username, person.paths) for person in people],
+            [('ListHub', 2), ('ListFan1', 1)],
+        )
+        self.assertFalse(people[0].followed)
+        self.assertContains(response, 'Подписаться')
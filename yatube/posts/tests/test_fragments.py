@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import fragments
+from ..caching import invalidate
+from ..models import Group, Post, User
+
+POST_TEMPLATE = 'posts/includes/post.html'
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='FragmentAuthor')
+        cls.group = Group.objects.create(title='Группа', slug='fragments')
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_render_from_cache(self):
+        """Повторная страница собирается из кеша без шаблона поста"""
+        first = Client().get(reverse('posts:index'))
+        self.assertTemplateUsed(first, POST_TEMPLATE)
+        invalidate('index')
+        second = Client().get(reverse('posts:index'))
+        self.assertTemplateNotUsed(second, POST_TEMPLATE)
+        self.assertEqual(second.content, first.content)
+
+    def test_key_follows_rendered_fields(self):
+        """Ключ меняется при правке, смене картинки и имени автора"""
+        post = Post.objects.feed().get(pk=self.post.pk)
+        key = fragments.make_key(post, True)
+        self.assertEqual(fragments.make_key(post, True), key)
+        self.assertNotEqual(fragments.make_key(post, False), key)
+        changes = (
+            ('text', post, 'Новый текст'),
+            ('image', post, 'posts/new.jpg'),
+            ('first_name', post.author, 'Имя'),
+        )
+        for field, instance, value in changes:
+            with self.subTest(field=field):
+                old = getattr(instance, field)
+                setattr(instance, field, value)
+                self.assertNotEqual(fragments.make_key(post, True), key)
+                setattr(instance, field, old)
+
+    def test_pending_thumbnails_not_cached(self):
+        """Фрагмент с неготовыми миниатюрами не сохраняется"""
+        request = RequestFactory().get('/')
+
+        def render(post):
+            request.thumbnails_pending = True
+            return 'html'
+
+        self.assertEqual(
+            fragments.render_many([self.post], render, request), ['html']
+        )
+        self.assertTrue(request.thumbnails_pending)
+        self.assertEqual(
+            cache.get_many([fragments.make_key(self.post)]), {}
+        )
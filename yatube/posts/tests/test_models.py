@@ -1,6 +1,7 @@
+from django.db import IntegrityError
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -34,3 +35,13 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         expected_text = post.text[:15]
         self.assertEqual(expected_text, str(post), 'Выводит не так text')
+
+
+class FollowModelTest(TestCase):
+    def test_follow_is_unique(self):
+        """Нельзя подписаться на автора дважды"""
+        user = User.objects.create_user(username='follower')
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=user, author=author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=user, author=author)
@@ -0,0 +1,64 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='QueryReader')
+        cls.group = Group.objects.create(
+            title='Query Group',
+            slug='query-group',
+            description='Test',
+        )
+        for number in range(3):
+            author = User.objects.create_user(
+                username=f'QueryAuthor{number}',
+                first_name='Имя',
+                last_name=f'Фамилия{number}',
+            )
+            Follow.objects.create(user=cls.user, author=author)
+            for post in range(5):
+                Post.objects.create(
+                    text=f'Query post {number}-{post}',
+                    author=author,
+                    group=cls.group,
+                )
+        cls.author = author
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feed_query_count(self):
+        """Ленты выполняют фиксированное число запросов"""
+        pages = {
+            reverse('posts:index'): 4,
+            reverse('posts:group_list', kwargs={'slug': 'query-group'}): 6,
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ): 6,
+            reverse('posts:follow_index'): 4,
+        }
+        for address, queries in pages.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(queries):
+                    response = self.authorized_client.get(address)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_query_count(self):
+        """Число запросов post_detail не зависит от числа комментариев"""
+        post = Post.objects.filter(author=self.author).first()
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.user, text=f'Comment {number}')
+            for number in range(50)
+        ])
+        with self.assertNumQueries(5):
+            self.authorized_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            )
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, SearchTerm, User
+from ..search import tokenize
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SearchAuthor')
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def found(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return response, list(response.context['page_obj'])
+
+    def test_tokenize(self):
+        """Слова приводятся к нижнему регистру, стоп-слова отброшены"""
+        self.assertEqual(
+            tokenize('Ёжик и ТУМАН, туман!'), ['ежик', 'туман', 'туман']
+        )
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при создании, правке и удалении поста"""
+        post = Post.objects.create(text='Первый снег', author=self.user)
+        self.assertEqual(self.found('снег')[1], [post])
+        post.text = 'Весенний дождь'
+        post.save()
+        self.assertEqual(self.found('снег')[1], [])
+        self.assertEqual(self.found('дождь')[1], [post])
+        post.delete()
+        self.assertFalse(SearchTerm.objects.exists())
+
+    def test_ranking(self):
+        """Найдены посты со всеми словами, чаще встречающиеся выше"""
+        rare = Post.objects.create(text='кот и пёс', author=self.user)
+        often = Post.objects.create(
+            text='кот, кот и ещё раз кот и пёс', author=self.user
+        )
+        Post.objects.create(text='только кот', author=self.user)
+        self.assertEqual(self.found('Кот пёс')[1], [often, rare])
+
+    def test_cursor_pagination(self):
+        """Результаты листаются курсором без повторов и пропусков"""
+        posts = [
+            Post.objects.create(text=f'море {number}', author=self.user)
+            for number in range(15)
+        ]
+        response, first = self.found('море')
+        self.assertEqual(len(first), 10)
+        after = response.context['page_obj'].next_query.split('after=')[1]
+        response, second = self.found('море', after=after)
+        self.assertEqual(len(second), 5)
+        self.assertFalse(response.context['page_obj'].has_next())
+        self.assertEqual(first + second, posts[::-1])
+
+    def test_empty_query(self):
+        """Пустой запрос и неизвестные слова ничего не находят"""
+        Post.objects.create(text='Пост', author=self.user)
+        for query in ('', 'и', 'несуществующее'):
+            with self.subTest(query=query):
+                response, posts = self.found(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(posts, [])
+
+    def test_rebuild_search(self):
+        """rebuild_search строит индекс заново"""
+        post = Post.objects.create(text='Горы', author=self.user)
+        SearchTerm.objects.all().delete()
+        call_command('rebuild_search', stdout=StringIO())
+        self.assertEqual(self.found('горы')[1], [post])
+
+    def test_admin_search(self):
+        """Поиск в админке использует поисковый индекс"""
+        post = Post.objects.create(text='Северное сияние', author=self.user)
+        Post.objects.create(text='Южный ветер', author=self.user)
+        admin = User.objects.create_superuser(
+            'SearchAdmin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'сияние'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [post]
+        )
@@ -0,0 +1,156 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from ..models import Post, User
+from ..thumbnails import (
+    VARIANTS, WIDTHS, ThumbnailPipeline, picture, supported_formats,
+    thumbnail_file,
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def mark_ready(image):
+    """Записывает варианты картинки в KV-хранилище вместо генерации."""
+    thumbnails = []
+    for variant in VARIANTS:
+        thumbnail = thumbnail_file(image.name, *variant)
+        thumbnail.set_size((1, 1))
+        default.kvstore.set(thumbnail)
+        thumbnails.append(thumbnail)
+    return thumbnails
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ThumbnailAuthor')
+        with mock.patch('posts.thumbnails.pipeline'):
+            cls.posts = [
+                Post.objects.create(
+                    text=f'Пост с картинкой {number}',
+                    author=cls.user,
+                    image=SimpleUploadedFile(
+                        name=f'thumb{number}.gif',
+                        content=SMALL_GIF,
+                        content_type='image/gif',
+                    ),
+                )
+                for number in range(3)
+            ]
+        cls.post = cls.posts[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_original_until_thumbnail_ready(self):
+        """Пока вариантов нет, отдаётся оригинал, а картинка в очереди"""
+        with mock.patch('posts.thumbnails.pipeline') as pipeline:
+            context = picture(self.post.image)
+        self.assertEqual(context, {
+            'sources': [],
+            'srcset': '',
+            'src': self.post.image.url,
+            'ready': False,
+        })
+        pipeline.submit.assert_called_once_with(self.post.image.name)
+        mark_ready(self.post.image)
+        with mock.patch('posts.thumbnails.pipeline') as pipeline:
+            context = picture(self.post.image)
+        pipeline.submit.assert_not_called()
+        self.assertTrue(context['ready'])
+        self.assertTrue(context['src'].startswith(settings.MEDIA_URL))
+        self.assertNotEqual(context['src'], self.post.image.url)
+        self.assertEqual(context['srcset'].count('w,'), 2)
+        self.assertEqual(
+            len(context['sources']), len(VARIANTS) // len(WIDTHS) - 1
+        )
+
+    def test_supported_formats(self):
+        """Форматы, которые Pillow не сохраняет, пропускаются"""
+        self.assertEqual(
+            supported_formats(['NOSUCHFORMAT', 'JPEG']), ['JPEG']
+        )
+
+    def test_feed_prefetches_thumbnails(self):
+        """Варианты картинок страницы ленты ищутся одним запросом"""
+        thumbnails = mark_ready(self.post.image)
+        cache.clear()
+        with mock.patch('posts.thumbnails.pipeline'), \
+                mock.patch.object(default.kvstore, 'get') as get, \
+                self.assertNumQueries(4):
+            response = Client().get(
+                reverse('posts:profile', args=[self.user.username])
+            )
+        get.assert_not_called()
+        for thumbnail in thumbnails:
+            self.assertContains(response, thumbnail.url)
+        for post in self.posts[1:]:
+            self.assertContains(response, post.image.url, count=1)
+        # Пока не все миниатюры готовы, страница не получает ETag.
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ThumbnailPipelineTest(TestCase):
+    def test_workers_setting(self):
+        """Потоки включает только POST_THUMBNAIL_WORKERS"""
+        pipeline = ThumbnailPipeline()
+        with override_settings(POST_THUMBNAIL_WORKERS=0):
+            self.assertFalse(pipeline.threaded)
+        with override_settings(POST_THUMBNAIL_WORKERS=3):
+            self.assertEqual(pipeline.workers, 3)
+            self.assertTrue(pipeline.threaded)
+
+    def test_bounded_queue_drops_overflow(self):
+        """Переполненная очередь не блокирует и не дублирует картинки"""
+        pipeline = ThumbnailPipeline(workers=1, queue_size=1)
+        with mock.patch.object(pipeline, '_start'):
+            pipeline.submit('posts/a.gif')
+            pipeline.submit('posts/a.gif')
+            pipeline.submit('posts/b.gif')
+        self.assertEqual(pipeline.queue.qsize(), 1)
+        self.assertEqual(pipeline.pending, {'posts/a.gif'})
+
+    def test_worker_generates_thumbnails(self):
+        """Рабочий поток генерирует миниатюры и снимает отметку"""
+        pipeline = ThumbnailPipeline(workers=1, queue_size=10)
+        with mock.patch('posts.thumbnails.generate') as generate_mock:
+            pipeline.submit('posts/a.gif')
+            pipeline.queue.join()
+        generate_mock.assert_called_once_with('posts/a.gif')
+        self.assertEqual(pipeline.pending, set())
+
+    def test_generation_errors_are_logged(self):
+        """Ошибка генерации не останавливает рабочий поток"""
+        pipeline = ThumbnailPipeline(workers=1, queue_size=10)
+        with mock.patch(
+            'posts.thumbnails.generate', side_effect=[OSError, None]
+        ) as generate_mock, self.assertLogs('posts.thumbnails', 'ERROR'):
+            pipeline.submit('posts/broken.gif')
+            pipeline.submit('posts/a.gif')
+            pipeline.queue.join()
+        self.assertEqual(generate_mock.call_count, 2)
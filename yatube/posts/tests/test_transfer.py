@@ -0,0 +1,155 @@
+import csv
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import (
+    Comment, FeedEntry, Follow, Group, Post, SearchTerm, User, UserStats
+)
+
+
+def export(*args):
+    output = StringIO()
+    call_command('export_yatube', *args, stdout=output, stderr=StringIO())
+    return output.getvalue()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ExportAuthor')
+        cls.reader = User.objects.create_user(username='ExportReader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='export-group', description='Описание'
+        )
+        cls.old = Post.objects.create(text='Старый пост', author=cls.author)
+        Post.objects.filter(pk=cls.old.pk).update(
+            created=timezone.now() - timedelta(days=10)
+        )
+        cls.new = Post.objects.create(
+            text='Новый пост', author=cls.author, group=cls.group
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.new, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_jsonl(self):
+        """JSONL содержит все модели с естественными ключами связей"""
+        rows = [json.loads(line) for line in export().splitlines()]
+        self.assertEqual(
+            [row['model'] for row in rows],
+            ['group', 'post', 'post', 'comment', 'follow'],
+        )
+        self.assertEqual(rows[2]['author'], 'ExportAuthor')
+        self.assertEqual(rows[2]['group'], 'export-group')
+        self.assertEqual(rows[3]['post'], self.new.pk)
+        self.assertEqual(
+            rows[4],
+            {'model': 'follow', 'user': 'ExportReader',
+             'author': 'ExportAuthor'},
+        )
+
+    def test_since(self):
+        """--since выгружает только новые посты"""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        rows = [
+            json.loads(line)
+            for line in export('post', '--since', since).splitlines()
+        ]
+        self.assertEqual([row['id'] for row in rows], [self.new.pk])
+
+    def test_csv(self):
+        """CSV выгружает одну модель с заголовком"""
+        output = export('comment', '--format', 'csv')
+        rows = list(csv.DictReader(StringIO(output)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['text'], 'Комментарий')
+        self.assertEqual(rows[0]['author'], 'ExportReader')
+
+
+class ImportTest(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='ImportAuthor')
+        reader = User.objects.create_user(username='ImportReader')
+        group = Group.objects.create(
+            title='Группа', slug='import-group', description='Описание'
+        )
+        post = Post.objects.create(
+            text='Импортный пост', author=author, group=group
+        )
+        Post.objects.create(text='Второй пост', author=reader)
+        Comment.objects.create(post=post, author=reader, text='Отзыв')
+        Follow.objects.create(user=reader, author=author)
+        dump = tempfile.NamedTemporaryFile('w', suffix='.jsonl')
+        dump.write(export())
+        dump.flush()
+        self.addCleanup(dump.close)
+        self.path = dump.name
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+
+    def load(self, *args):
+        output = StringIO()
+        call_command('import_yatube', self.path, *args, stdout=output)
+        return output.getvalue()
+
+    def test_round_trip(self):
+        """Выгрузка загружается обратно вместе со счётчиками и лентой"""
+        self.assertIn('строк/с', self.load('--batch-size', '1'))
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text='Импортный пост')
+        self.assertEqual(post.author.username, 'ImportAuthor')
+        self.assertEqual(post.group.slug, 'import-group')
+        self.assertEqual(post.comments_count, 1)
+        stats = UserStats.objects.get(user=post.author)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (1, 1)
+        )
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user__username', 'post')),
+            [('ImportReader', post.pk)],
+        )
+        self.assertTrue(SearchTerm.objects.filter(term='импортный'))
+
+    def test_skip_signals(self):
+        """С --skip-signals загружаются только сами строки"""
+        self.load('--skip-signals')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertFalse(SearchTerm.objects.exists())
+        self.assertEqual(
+            Post.objects.get(text='Импортный пост').comments_count, 0
+        )
+
+    def test_repeated_import(self):
+        """Повторная загрузка пропускает уже загруженные строки"""
+        self.load()
+        output = self.load()
+        self.assertIn('post: загружено 0, пропущено 2', output)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        post = Post.objects.get(text='Импортный пост')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=post.author).posts_count, 1
+        )
+        self.assertEqual(FeedEntry.objects.count(), 1)
+
+    def test_rows_without_id(self):
+        """Пост без id в строке выгрузки получает новый"""
+        with open(self.path, 'w') as dump:
+            dump.write(json.dumps({
+                'model': 'post', 'text': 'Без id', 'author': 'NoIdAuthor',
+            }) + '\n')
+        self.assertIn('post: загружено 1', self.load())
+        self.assertTrue(Post.objects.filter(text='Без id').exists())
@@ -1,21 +1,26 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.test import Client, TestCase, override_settings
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 
-from ..models import Group, Post, User, Follow
+from ..models import Comment, Group, Post, User, Follow
+from ..paginator import CursorPaginator
 
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
 class PostPagesTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -71,6 +76,7 @@ class PostPagesTest(TestCase):
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
+        cache.clear()
 
     @classmethod
     def tearDownClass(cls):
@@ -179,6 +185,16 @@ class PostPagesTest(TestCase):
                 form_field = response.context['page_obj'][0].image
                 self.assertEqual(form_field, 'posts/small.gif')
 
+    def test_post_list_group_links(self):
+        """Ссылка на группу поста есть в ленте, но не на странице группы"""
+        group_url = reverse('posts:group_list', args=[self.group_slug])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post_text)
+        self.assertContains(response, f'href="{group_url}"')
+        response = self.client.get(group_url)
+        self.assertContains(response, self.post_text)
+        self.assertNotContains(response, f'href="{group_url}"')
+
     def test_image_post_detail(self):
         response = self.authorized_client.get(reverse(
             'posts:post_detail', kwargs={'post_id': '1'}
@@ -254,6 +270,82 @@ class PaginatorTest(TestCase):
         ) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), self.SECOND_PAGE)
 
+    def test_cursor_pages(self):
+        """Курсоры ?after= и ?before= листают ленту в обе стороны"""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertFalse(first.has_previous())
+        second = self.client.get(
+            reverse('posts:index') + '?' + first.next_query
+        ).context['page_obj']
+        self.assertEqual(len(second), self.SECOND_PAGE)
+        self.assertFalse(second.has_next())
+        back = self.client.get(
+            reverse('posts:index') + '?' + second.previous_query
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_before_newest_is_first_page(self):
+        """?before= от самого нового поста отдаёт первую страницу"""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        cursor = CursorPaginator.encode(first[0])
+        page = self.client.get(
+            reverse('posts:index') + f'?before={cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(page), list(first))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_cursor_page_without_count(self):
+        """Лента по курсору не выполняет COUNT(*)"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='CommentReader')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.user)
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.user, text=f'Коммент {number}')
+            for number in range(25)
+        ])
+        cls.comments = list(Comment.objects.order_by('created', 'pk'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_page_is_bounded(self):
+        """post_detail показывает первую страницу комментариев"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.comments[:20])
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'js-more-comments')
+
+    def test_load_more_fragment(self):
+        """Фрагмент «Показать ещё» отдаёт комментарии после курсора"""
+        first = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+            + '?' + first.next_query
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            list(response.context['comments']), self.comments[20:]
+        )
+        self.assertNotContains(response, 'js-more-comments')
+        self.assertNotContains(response, '<html')
+
 
 class CacheTest(TestCase):
     @classmethod
@@ -276,12 +368,13 @@ class CacheTest(TestCase):
         self.authorized_client.force_login(self.user)
 
     def test_cache(self):
+        """Главная отдаётся из кеша, пока пост не изменён через модель"""
         post_obj = Post.objects.create(
             text='simple text',
             author=self.user,
         )
         response = self.client.get(reverse('posts:index')).content
-        post_obj.delete()
+        Post.objects.filter(pk=post_obj.pk).update(text='silent text')
         new = self.client.get(reverse('posts:index')).content
         self.assertEqual(response, new)
         cache.clear()
@@ -290,6 +383,143 @@ class CacheTest(TestCase):
             self.client.get(reverse('posts:index')).content
         )
 
+    def test_cache_invalidated_on_delete(self):
+        """Удаление поста сбрасывает кеш лент"""
+        post_obj = Post.objects.create(
+            text='simple text',
+            author=self.user,
+        )
+        response = self.client.get(reverse('posts:index')).content
+        post_obj.delete()
+        self.assertNotEqual(
+            response,
+            self.client.get(reverse('posts:index')).content
+        )
+
+    def test_post_does_not_touch_follower_scopes(self):
+        """Пост автора не сбрасывает области каждого подписчика"""
+        User.objects.bulk_create(
+            User(username=f'CacheFan{number}') for number in range(50)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=fan, author=self.user)
+            for fan in User.objects.filter(username__startswith='CacheFan')
+        )
+        with mock.patch('posts.caching._bump') as bump:
+            post = Post.objects.create(text='popular', author=self.user)
+        scopes = set().union(*(call.args[0] for call in bump.mock_calls))
+        self.assertEqual(
+            scopes, {'index', f'profile:{self.user.pk}', f'post:{post.pk}'}
+        )
+
+    def test_rename_touches_author_scopes(self):
+        """Смена имени сбрасывает только области, где оно видно"""
+        author = User.objects.create_user(username='CacheRenamed')
+        group = Group.objects.create(title='Группа', slug='cache-rename')
+        post = Post.objects.create(text='Пост', author=self.user)
+        Post.objects.create(text='В группе', author=author, group=group)
+        Comment.objects.create(post=post, author=author, text='Отзыв')
+        with mock.patch('posts.caching._bump') as bump:
+            author.last_login = timezone.now()
+            author.save(update_fields=['last_login'])
+            author.email = 'renamed@example.com'
+            author.save()
+            bump.assert_not_called()
+            author.first_name = 'Имя'
+            author.save()
+        scopes = set().union(*(call.args[0] for call in bump.mock_calls))
+        self.assertEqual(scopes, {
+            'index',
+            f'profile:{author.pk}',
+            f'follow:{author.pk}',
+            f'group:{group.pk}',
+            f'post:{post.pk}',
+        })
+
+    def test_cache_keyed_by_page(self):
+        """Вторая страница не берётся из кеша первой"""
+        for number in range(10):
+            Post.objects.create(text=f'page {number}', author=self.user)
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertNotEqual(
+            list(first.context['page_obj']),
+            list(second.context['page_obj']),
+        )
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='EtagReader')
+        cls.author = User.objects.create_user(username='EtagAuthor')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, address, client=None):
+        client = client or self.client
+        etag = client.get(address)['ETag']
+        return client.get(address, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_not_modified(self):
+        """Неизменившиеся страницы отдаются ответом 304"""
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'EtagAuthor'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.revalidate(address)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_changes_update_etag(self):
+        """Новый пост, комментарий и подписка меняют ETag страниц"""
+        def new_post():
+            Post.objects.create(text='Новый пост', author=self.author)
+
+        def new_comment():
+            Comment.objects.create(
+                post=self.post, author=self.user, text='Комментарий'
+            )
+
+        def new_follow():
+            Follow.objects.create(user=self.user, author=self.author)
+
+        changes = {
+            reverse('posts:index'): new_post,
+            reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ): new_comment,
+            reverse(
+                'posts:profile', kwargs={'username': 'EtagAuthor'}
+            ): new_follow,
+            reverse('posts:follow_index'): new_post,
+        }
+        for address, change in changes.items():
+            with self.subTest(address=address):
+                etag = self.authorized_client.get(address)['ETag']
+                change()
+                response = self.authorized_client.get(
+                    address, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и авторизованный пользователь получают разные ETag"""
+        address = reverse('posts:index')
+        self.assertNotEqual(
+            self.client.get(address)['ETag'],
+            self.authorized_client.get(address)['ETag'],
+        )
+
 
 class FollowTest(TestCase):
     @classmethod
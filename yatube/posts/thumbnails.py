@@ -0,0 +1,264 @@
+"""Фоновая генерация миниатюр картинок постов.
+
+sorl-thumbnail создаёт миниатюру при первом рендере шаблона, и за
+декодирование и ресайз платит первый посетитель. Здесь варианты всех
+ширин ``POST_IMAGE_WIDTHS`` во всех форматах ``POST_IMAGE_FORMATS``
+готовятся в пуле потоков сразу после сохранения поста, а шаблон до их
+готовности показывает исходную картинку.
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connection
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import EXTENSIONS
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.models import KVStore
+
+logger = logging.getLogger(__name__)
+
+# Картинка поста показывается кадром 960x339; варианты той же пропорции
+# готовятся для каждой ширины из POST_IMAGE_WIDTHS и каждого формата из
+# POST_IMAGE_FORMATS, который умеет сохранять установленный Pillow.
+SIZE = getattr(settings, 'POST_IMAGE_SIZE', (960, 339))
+WIDTHS = getattr(settings, 'POST_IMAGE_WIDTHS', (320, 640, 960))
+FORMATS = getattr(settings, 'POST_IMAGE_FORMATS', ('AVIF', 'WEBP', 'JPEG'))
+OPTIONS = {'crop': 'center', 'upscale': True}
+FALLBACK_FORMAT = 'JPEG'
+WORKERS = 2
+QUEUE_SIZE = getattr(settings, 'POST_THUMBNAIL_QUEUE_SIZE', 100)
+
+EXTENSIONS.setdefault('AVIF', 'avif')
+
+
+def supported_formats(formats=FORMATS):
+    """Форматы, которые Pillow умеет сохранять; JPEG есть всегда."""
+    Image.init()
+    return [
+        format for format in formats
+        if format == FALLBACK_FORMAT or format in Image.SAVE
+    ]
+
+
+def geometry(width):
+    return f'{width}x{round(width * SIZE[1] / SIZE[0])}'
+
+
+VARIANTS = [
+    (format, width)
+    for format in supported_formats() + [FALLBACK_FORMAT]
+    for width in WIDTHS
+]
+VARIANTS = list(dict.fromkeys(VARIANTS))
+
+
+def thumbnail_file(name, format, width):
+    """ImageFile варианта так, как его назовёт sorl, без генерации."""
+    backend = default.backend
+    source = ImageFile(name)
+    options = dict(OPTIONS, format=format)
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(
+        backend._get_thumbnail_filename(source, geometry(width), options),
+        default.storage,
+    )
+
+
+def generate(name):
+    for format, width in VARIANTS:
+        get_thumbnail(name, geometry(width), format=format, **OPTIONS)
+
+
+def _generate(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+
+
+class ThumbnailPipeline:
+    """Пул потоков с ограниченной очередью имён картинок.
+
+    Переполненная очередь не блокирует запрос: имя отбрасывается, и
+    картинка снова попадёт в очередь при следующем рендере без миниатюры.
+    Без ``workers`` число потоков берётся из ``POST_THUMBNAIL_WORKERS``
+    при каждом обращении, поэтому его можно менять через
+    ``override_settings``; 0 — создавать миниатюры сразу в запросе.
+    """
+
+    def __init__(self, workers=None, queue_size=QUEUE_SIZE):
+        self._workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def _start(self):
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name='thumbnails', daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    @property
+    def workers(self):
+        if self._workers is not None:
+            return self._workers
+        return getattr(settings, 'POST_THUMBNAIL_WORKERS', WORKERS)
+
+    @property
+    def threaded(self):
+        """Есть ли фоновые потоки."""
+        return bool(self.workers)
+
+    def submit(self, name):
+        if not self.threaded:
+            _generate(name)
+            return
+        with self.lock:
+            if name in self.pending:
+                return
+            try:
+                self.queue.put_nowait(name)
+            except queue.Full:
+                logger.warning('Очередь миниатюр заполнена: %s', name)
+                return
+            self.pending.add(name)
+            self._start()
+
+    def _work(self):
+        while True:
+            name = self.queue.get()
+            try:
+                _generate(name)
+            finally:
+                connection.close()
+                with self.lock:
+                    self.pending.discard(name)
+                self.queue.task_done()
+
+
+pipeline = ThumbnailPipeline()
+
+
+def _lookup(keys):
+    """Значения KV-хранилища sorl: один get_many и один запрос к БД.
+
+    Повторяет поведение cached_db_kvstore: найденное в БД и отсутствующее
+    (как EMPTY_VALUE) записывается в кеш.
+    """
+    store = default.kvstore.cache
+    values = store.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStore.objects.filter(key__in=missing).values_list(
+                'key', 'value'
+            )
+        )
+        store.set_many(
+            {key: found.get(key, EMPTY_VALUE) for key in missing},
+            sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(found)
+    return {
+        key: value for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def prefetch_urls(posts):
+    """Заранее находит готовые варианты картинок страницы.
+
+    URL кладутся в ``post.image.thumbnail_urls``, откуда их берёт
+    ``variant_urls`` вместо отдельного обращения к KV-хранилищу.
+    """
+    images = {}
+    for post in posts:
+        if not post.image:
+            continue
+        post.image.thumbnail_urls = {}
+        for variant in VARIANTS:
+            key = add_prefix(thumbnail_file(post.image.name, *variant).key)
+            images.setdefault(key, []).append((post.image, variant))
+    if not images:
+        return
+    for key, value in _lookup(list(images)).items():
+        url = deserialize_image_file(value).url
+        for image, variant in images[key]:
+            image.thumbnail_urls[variant] = url
+
+
+def _stored_urls(image):
+    urls = {}
+    for variant in VARIANTS:
+        thumbnail = default.kvstore.get(thumbnail_file(image.name, *variant))
+        if thumbnail is not None:
+            urls[variant] = thumbnail.url
+    return urls
+
+
+def variant_urls(image):
+    """URL готовых вариантов картинки: {(формат, ширина): url}.
+
+    Если готовы не все варианты, картинка ставится в очередь на генерацию.
+    """
+    urls = getattr(image, 'thumbnail_urls', None)
+    if urls is None:
+        urls = _stored_urls(image)
+    if len(urls) < len(VARIANTS):
+        pipeline.submit(image.name)
+        if not pipeline.threaded:
+            urls = _stored_urls(image)
+    return urls
+
+
+def _srcset(urls, format):
+    return ', '.join(
+        f'{urls[format, width]} {width}w'
+        for width in WIDTHS if (format, width) in urls
+    )
+
+
+def picture(image):
+    """Источники для <picture>: srcset по форматам и запасной src.
+
+    Пока нет ни одного JPEG-варианта, показывается исходная картинка.
+    ``ready`` говорит, что готовы все варианты и разметка окончательная.
+    """
+    urls = variant_urls(image)
+    srcset = _srcset(urls, FALLBACK_FORMAT)
+    ready = len(urls) == len(VARIANTS)
+    if not srcset:
+        return {
+            'sources': [],
+            'srcset': '',
+            'src': image.url,
+            'ready': ready,
+        }
+    sources = []
+    for format in dict.fromkeys(format for format, _ in VARIANTS):
+        if format != FALLBACK_FORMAT and _srcset(urls, format):
+            sources.append({
+                'type': f'image/{format.lower()}',
+                'srcset': _srcset(urls, format),
+            })
+    widths = [w for w in WIDTHS if (FALLBACK_FORMAT, w) in urls]
+    return {
+        'sources': sources,
+        'srcset': srcset,
+        'src': urls[FALLBACK_FORMAT, max(widths)],
+        'ready': ready,
+    }
@@ -0,0 +1,322 @@
+"""Выгрузка и загрузка данных постов в JSONL и CSV.
+
+Связи записываются естественными ключами (имя пользователя, slug
+группы), поэтому файл можно загрузить в другую базу. Строки читаются
+из базы кусками через ``iterator(chunk_size=...)`` и сразу пишутся в
+поток: расход памяти не зависит от размера таблиц. Загрузка идёт
+пачками ``bulk_create``, связи пачки разрешаются одним запросом.
+"""
+from collections import Counter
+from datetime import datetime
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import explicit_created
+from . import counters, feed, search
+from .caching import invalidate
+from .models import Comment, Follow, Group, Post, UserStats
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+User = get_user_model()
+
+# Модель в файле: класс и соответствие «колонка файла — поле values()».
+# Порядок моделей совпадает с порядком зависимостей при загрузке.
+EXPORTS = {
+    'group': (Group, {
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    }),
+    'post': (Post, {
+        'id': 'id',
+        'text': 'text',
+        'created': 'created',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+    }),
+    'comment': (Comment, {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }),
+    'follow': (Follow, {
+        'user': 'user__username',
+        'author': 'author__username',
+    }),
+}
+
+
+def columns(name):
+    return list(EXPORTS[name][1])
+
+
+def export_rows(name, since=None, chunk_size=CHUNK_SIZE):
+    """Строки модели ``name`` в порядке pk.
+
+    ``since`` отбирает записи, созданные не раньше этого момента; у
+    групп и подписок нет даты создания, они выгружаются целиком.
+    """
+    model, fields = EXPORTS[name]
+    queryset = model.objects.order_by('pk')
+    if since is not None and 'created' in fields:
+        queryset = queryset.filter(created__gte=since)
+    for values in queryset.values_list(*fields.values()).iterator(
+        chunk_size=chunk_size
+    ):
+        row = dict(zip(fields, values))
+        for key, value in row.items():
+            if isinstance(value, datetime):
+                row[key] = value.isoformat()
+        yield row
+
+
+def _users(usernames):
+    """pk пользователей по именам одним запросом.
+
+    Авторов, которых нет в базе, заводит без пароля: выгрузка не несёт
+    учётных записей, только имена.
+    """
+    usernames = set(usernames)
+    found = dict(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', 'pk'
+        )
+    )
+    missing = usernames - found.keys()
+    if missing:
+        User.objects.bulk_create(
+            User(username=username, password=make_password(None))
+            for username in missing
+        )
+        created = dict(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
+        UserStats.objects.bulk_create(
+            UserStats(user_id=user_id) for user_id in created.values()
+        )
+        found.update(created)
+    return found
+
+
+def _new_rows(model, rows):
+    """Строки, чьих ``id`` ещё нет в базе, без повторов внутри пачки.
+
+    Повторная загрузка той же выгрузки или пересекающихся выгрузок
+    ``--since`` пропускает уже загруженные записи, и их счётчики, ленты
+    и поиск не применяются второй раз. Строки без ``id`` получают новый.
+    """
+    ids = {row['id'] for row in rows if row.get('id') is not None}
+    seen = set(
+        model.objects.filter(pk__in=ids).values_list('pk', flat=True)
+    )
+    fresh = []
+    for row in rows:
+        row_id = row.get('id')
+        if row_id is not None:
+            if row_id in seen:
+                continue
+            seen.add(row_id)
+        fresh.append(row)
+    return fresh
+
+
+def _assign_ids(model, objects):
+    """Выдаёт pk записям без ``id``, если ``bulk_create`` их не вернёт.
+
+    Без pk после вставки нельзя обновить ленты и поиск. Пачка грузится
+    в транзакции, так что берутся номера следом за наибольшим pk;
+    последовательности после загрузки сдвигает ``reset_sequences()``.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        return
+    missing = [obj for obj in objects if obj.pk is None]
+    if not missing:
+        return
+    last = max(
+        model.objects.aggregate(last=Max('pk'))['last'] or 0,
+        max((obj.pk for obj in objects if obj.pk is not None), default=0),
+    )
+    for pk, obj in enumerate(missing, last + 1):
+        obj.pk = pk
+
+
+def _created(row):
+    if row.get('created'):
+        return parse_datetime(row['created'])
+    return timezone.now()
+
+
+def _load_groups(rows, side_effects):
+    Group.objects.bulk_create(
+        (
+            Group(
+                slug=row['slug'],
+                title=row['title'],
+                description=row.get('description', ''),
+            )
+            for row in rows
+        ),
+        ignore_conflicts=True,
+    )
+    return len(rows)
+
+
+def _load_posts(rows, side_effects):
+    rows = _new_rows(Post, rows)
+    authors = _users(row['author'] for row in rows)
+    groups = dict(
+        Group.objects.filter(
+            slug__in={row['group'] for row in rows if row.get('group')}
+        ).values_list('slug', 'pk')
+    )
+    posts = [
+        Post(
+            id=row.get('id'),
+            text=row['text'],
+            created=_created(row),
+            author_id=authors[row['author']],
+            group_id=groups.get(row.get('group')),
+            image=row.get('image') or '',
+        )
+        for row in rows
+    ]
+    _assign_ids(Post, posts)
+    with explicit_created(Post):
+        Post.objects.bulk_create(posts)
+    if side_effects:
+        counters.change_users(
+            'posts_count', Counter(post.author_id for post in posts)
+        )
+        feed.fan_out_posts(posts)
+        search.index_posts(posts)
+        invalidate(
+            'index',
+            *(f'profile:{post.author_id}' for post in posts),
+            *(f'group:{post.group_id}' for post in posts if post.group_id),
+        )
+    return len(posts)
+
+
+def _load_comments(rows, side_effects):
+    rows = _new_rows(Comment, rows)
+    authors = _users(row['author'] for row in rows)
+    posts = set(
+        Post.objects.filter(
+            pk__in={row['post'] for row in rows}
+        ).values_list('pk', flat=True)
+    )
+    comments = [
+        Comment(
+            id=row.get('id'),
+            post_id=row['post'],
+            author_id=authors[row['author']],
+            text=row['text'],
+            created=_created(row),
+        )
+        for row in rows
+        if row['post'] in posts
+    ]
+    with explicit_created(Comment):
+        Comment.objects.bulk_create(comments)
+    if side_effects:
+        counts = Counter(comment.post_id for comment in comments)
+        counters.change_posts(counts)
+        invalidate(*(f'post:{post_id}' for post_id in counts))
+    return len(comments)
+
+
+def _load_follows(rows, side_effects):
+    users = _users(
+        name for row in rows for name in (row['user'], row['author'])
+    )
+    pairs = {
+        (users[row['user']], users[row['author']])
+        for row in rows
+        if row['user'] != row['author']
+    }
+    pairs -= set(
+        Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            author_id__in={author_id for _, author_id in pairs},
+        ).values_list('user_id', 'author_id')
+    )
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+        ),
+        ignore_conflicts=True,
+    )
+    if side_effects:
+        counters.change_users(
+            'following_count', Counter(user_id for user_id, _ in pairs)
+        )
+        counters.change_users(
+            'followers_count', Counter(author_id for _, author_id in pairs)
+        )
+        feed.add_authors(pairs)
+        invalidate(
+            *(f'follow:{user_id}' for user_id, _ in pairs),
+            *(f'profile:{user_id}' for pair in pairs for user_id in pair),
+        )
+    return len(pairs)
+
+
+LOADERS = {
+    'group': _load_groups,
+    'post': _load_posts,
+    'comment': _load_comments,
+    'follow': _load_follows,
+}
+
+
+def _batches(rows, batch_size):
+    """Подряд идущие строки одной модели пачками по ``batch_size``."""
+    for name, group in groupby(rows, key=itemgetter('model')):
+        if name not in LOADERS:
+            raise ValueError(f'Неизвестная модель: {name}')
+        while True:
+            batch = list(islice(group, batch_size))
+            if not batch:
+                break
+            yield name, batch
+
+
+def reset_sequences(*models):
+    """После вставки с явными pk сдвигает последовательности (PostgreSQL)."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def import_rows(rows, batch_size=BATCH_SIZE, side_effects=True):
+    """Загружает строки выгрузки пачками через ``bulk_create``.
+
+    Каждая пачка — отдельная транзакция; после неё отдаётся тройка
+    (модель, число прочитанных строк, число загруженных). ``bulk_create``
+    не посылает сигналов, поэтому то, что делают обработчики в
+    ``signals`` (счётчики, ленты, поиск, кеш), выполняется здесь одним
+    набором запросов на пачку. С ``side_effects=False`` это
+    пропускается, и после загрузки нужны ``rebuild_feed --all``,
+    ``rebuild_search`` и ``reconcile_counters``.
+    """
+    for name, batch in _batches(rows, batch_size):
+        with transaction.atomic():
+            loaded = LOADERS[name](batch, side_effects)
+        yield name, len(batch), loaded
+    reset_sequences(Post, Comment)
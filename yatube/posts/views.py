@@ -1,34 +1,90 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 
 
+from . import counters
+from . import follows
+from . import search as post_search
+from .caching import cached_page, conditional
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Follow
+from .models import Comment, FeedEntry, Group, Post
+from .paginator import CommentPaginator, FollowPaginator, paginate
+from .thumbnails import prefetch_urls
 
 POSTS = 10
+COMMENTS = 20
+PEOPLE = 20
+SUGGESTIONS = 20
 User = get_user_model()
 
 
-def page_list(set, request):
-    paginator = Paginator(set, POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def page_list(set, request, scopes, viewer=None):
+    page_obj = cached_page(set, request, POSTS, scopes, viewer)
+    prepare_posts(request, page_obj)
     return page_obj
 
 
+def prepare_posts(request, posts):
+    """Миниатюры и состояние кнопок подписки для постов страницы."""
+    prefetch_urls(posts)
+    follows.mark_followed(request.user, posts)
+
+
+def viewer_scopes(request):
+    """Области, от которых зависит страница для конкретного зрителя."""
+    if request.user.is_authenticated:
+        return [f'follow:{request.user.pk}']
+    return []
+
+
+def index_scopes(request):
+    return ['index', *viewer_scopes(request)]
+
+
+def group_scopes(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return [f'group:{group_id}', *viewer_scopes(request)]
+
+
+def profile_scopes(request, username):
+    user_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if user_id is None:
+        return None
+    return [f'profile:{user_id}', *viewer_scopes(request)]
+
+
+def post_scopes(request, post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    return [f'post:{post_id}', f'profile:{author_id}']
+
+
+@conditional(index_scopes)
 def index(request):
-    page_obj = page_list(Post.objects.all(), request)
+    page_obj = page_list(Post.objects.feed(), request, ['index'])
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    page_obj = page_list(group.posts.all(), request)
+    page_obj = page_list(
+        group.posts.feed(), request, [f'group:{group.pk}']
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -36,10 +92,14 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional(profile_scopes)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    page_obj = page_list(user.posts.all(), request)
-    following = Follow.objects.filter(author=user).exists()
+    user = get_profile_user(username)
+    page_obj = cached_page(
+        user.posts.feed(), request, POSTS, [f'profile:{user.pk}']
+    )
+    prefetch_urls(page_obj)
+    following = follows.is_following(request.user, user)
     context = {
         'author': user,
         'page_obj': page_obj,
@@ -48,18 +108,61 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional(post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': comments,
+        'comments': comment_page(post.pk, request),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_page(post_id, request):
+    return cached_page(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        request,
+        COMMENTS,
+        [f'post:{post_id}'],
+        paginator_class=CommentPaginator,
+    )
+
+
+@conditional(post_scopes)
+def post_comments(request, post_id):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': comment_page(post.pk, request),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    page_obj = paginate(
+        post_search.ranked(query), request, POSTS,
+        post_search.SearchPaginator,
+    )
+    posts = Post.objects.feed().in_bulk(
+        [row['post_id'] for row in page_obj]
+    )
+    page_obj.object_list = [
+        posts[row['post_id']] for row in page_obj if row['post_id'] in posts
+    ]
+    prepare_posts(request, page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     template = 'posts/post_create.html'
@@ -72,7 +175,8 @@ def post_create(request):
         return render(request, template, {'form': form})
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    with transaction.atomic():
+        post.save()
     return redirect('posts:profile', request.user.username)
 
 
@@ -91,7 +195,8 @@ def post_edit(request, post_id):
             'form': form
         }
         return render(request, 'posts/post_create.html', context)
-    form.save()
+    # Только поля формы: comments_count меняют комментарии параллельно.
+    form.save(commit=False).save(update_fields=PostForm.Meta.fields)
     return redirect('posts:post_detail', post_id)
 
 
@@ -103,15 +208,20 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@conditional(index_scopes)
 def follow_index(request):
-    user = request.user
-    follow = Post.objects.filter(author__following__user=user)
-    page_obj = page_list(follow, request)
+    # Один диапазон индекса FeedEntry: кеш страниц не нужен. ETag
+    # сбрасывают любые посты (index) и подписки зрителя (follow:<id>).
+    entries = FeedEntry.objects.filter(user=request.user).feed()
+    page_obj = paginate(entries, request, POSTS)
+    page_obj.object_list = [entry.post for entry in page_obj]
+    prepare_posts(request, page_obj)
     context = {
         'page_obj': page_obj,
     }
@@ -121,19 +231,89 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if author != request.user:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author
-        )
-
+    follows.follow(request.user, author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(
-        author=author
-    ).delete()
+    with transaction.atomic():
+        follows.unfollow(request.user, author)
     return redirect('posts:profile', username=username)
+
+
+def mark_people(request, people):
+    """Проставляет людям из списка поля для кнопок подписки."""
+    user = request.user
+    followed = follows.followed_authors(
+        user, (person.pk for person in people)
+    )
+    for person in people:
+        person.can_follow = user.is_authenticated and person.pk != user.pk
+        person.followed = person.pk in followed
+
+
+def people_page(request, author, edges, field, title, total=None):
+    """Страница людей из рёбер ``edges``: ``field`` — нужный конец ребра."""
+    page_obj = paginate(edges, request, PEOPLE, FollowPaginator)
+    page_obj.object_list = [getattr(edge, field) for edge in page_obj]
+    mark_people(request, page_obj.object_list)
+    context = {
+        'author': author,
+        'title': title,
+        'total': total,
+        'people': page_obj.object_list,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/people.html', context)
+
+
+def get_profile_user(username):
+    user = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    counters.user_stats(user)
+    return user
+
+
+def followers(request, username):
+    user = get_profile_user(username)
+    return people_page(
+        request, user, follows.followers(user), 'user',
+        'Подписчики', user.stats.followers_count,
+    )
+
+
+def following(request, username):
+    user = get_profile_user(username)
+    return people_page(
+        request, user, follows.following(user), 'author',
+        'Подписки', user.stats.following_count,
+    )
+
+
+def mutual(request, username):
+    user = get_profile_user(username)
+    edges, field = follows.mutual(user)
+    return people_page(request, user, edges, field, 'Взаимные подписки')
+
+
+@login_required
+def suggestions(request):
+    rows = follows.suggested(request.user, SUGGESTIONS)
+    found = User.objects.select_related('stats').in_bulk(
+        [author_id for author_id, _ in rows]
+    )
+    people = []
+    for author_id, paths in rows:
+        if author_id in found:
+            found[author_id].paths = paths
+            people.append(found[author_id])
+    mark_people(request, people)
+    context = {
+        'author': request.user,
+        'title': 'Рекомендуемые авторы',
+        'people': people,
+    }
+    return render(request, 'posts/people.html', context)
@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '!z%omopb%9-*0zh7)6$8&8z5!59p0mqgq$o(+v^wx#&oe$&!kq'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -45,11 +45,13 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,9 +59,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Без DEBUG шаблоны компилируются один раз на процесс и дальше берутся из
+# памяти; TEMPLATE_CACHE=1 включает это и при DEBUG (изменения шаблонов
+# тогда видны только после перезапуска).
+TEMPLATE_CACHE = not DEBUG or os.getenv('TEMPLATE_CACHE', '') == '1'
+
+# debug_toolbar подменяет Template._render ради панели шаблонов и требует
+# APP_DIRS, которого нет у кеширующего загрузчика, поэтому он включается
+# только при DEBUG без кеша шаблонов.
+if DEBUG and not TEMPLATE_CACHE:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -84,6 +97,15 @@ TEMPLATES = [
     },
 ]
 
+if TEMPLATE_CACHE:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -150,10 +172,86 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
+# Кеш выбирается переменными окружения. Для нескольких воркеров на одном
+# хосте нужен общий бэкенд: CACHE_BACKEND=file или CACHE_BACKEND=sqlite.
+# CACHE_LOCAL_TIMEOUT > 0 добавляет перед ним локальный кеш процесса.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHE_LOCATION = os.getenv(
+    'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+)
+
+CACHE_LOCAL_TIMEOUT = int(os.getenv('CACHE_LOCAL_TIMEOUT', 0))
+
+# По умолчанию Django держит 300 записей и при переполнении выбрасывает
+# треть кеша, включая версии областей лент.
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 100000))
+
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': CACHE_LOCATION + '.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+if CACHE_LOCAL_TIMEOUT:
+    CACHES = {
+        'shared': CACHE_BACKENDS[CACHE_BACKEND],
+        'default': {
+            'BACKEND': 'core.cache.TwoLevelCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {'LOCAL_TIMEOUT': CACHE_LOCAL_TIMEOUT},
+        },
     }
+
+FEED_CACHE_TIMEOUT = 5 * 60
+
+# Варианты картинок постов для srcset. Форматы, которые установленный
+# Pillow не умеет сохранять (например, AVIF), пропускаются.
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+# Потоки фоновой генерации миниатюр; 0 — создавать их сразу в запросе.
+POST_THUMBNAIL_WORKERS = int(os.getenv('POST_THUMBNAIL_WORKERS', 2))
+
+# Доля запросов, которые измеряет core.middleware.MetricsMiddleware
+# (0 — middleware выключен). Итоги по view раз в METRICS_LOG_INTERVAL
+# секунд пишутся в лог core.metrics, накопленные видны staff на /metrics/.
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0))
+
+METRICS_LOG_INTERVAL = int(os.getenv('METRICS_LOG_INTERVAL', 60))
+
+# core.middleware.QueryInspectorMiddleware (для staging): пишет в лог
+# core.queries SQL, выполненный за запрос DUPLICATE_QUERY_LIMIT и больше
+# раз, и запросы дольше SLOW_QUERY_MS миллисекунд.
+QUERY_INSPECTOR = os.getenv('QUERY_INSPECTOR', '') == '1'
+
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+
+DUPLICATE_QUERY_LIMIT = int(os.getenv('DUPLICATE_QUERY_LIMIT', 2))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': 'INFO'},
+    },
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'